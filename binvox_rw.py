@@ -61,12 +61,15 @@ True
 True
 """
 
+import mmap
 import numpy as np
 
 class Voxels(object):
     """ Holds a binvox model.
-    data is either a three-dimensional numpy boolean array (dense representation)
-    or a two-dimensional numpy float array (coordinate representation).
+    data is either a three-dimensional numpy boolean array (dense representation),
+    a two-dimensional numpy float array (coordinate representation) or a
+    one-dimensional numpy uint8 array holding 8 voxels per byte (packed
+    representation, as returned by np.packbits on the flattened dense data).
 
     dims, translate and scale are the model metadata.
 
@@ -100,6 +103,88 @@ class Voxels(object):
     def write(self, fp):
         write(self, fp)
 
+    def packed(self):
+        """ Bit-packed data, see dense_to_packed.
+        """
+        if self.data.ndim==1:
+            return self.data
+        elif self.data.ndim==2:
+            return sparse_to_packed(self.data, self.dims)
+        else:
+            return dense_to_packed(self.data)
+
+    def count(self):
+        """ Number of occupied voxels.
+        """
+        return packed_count(self.packed())
+
+    def union(self, other):
+        """ Union with another model of the same dims, in packed representation.
+        """
+        assert list(self.dims) == list(other.dims)
+        return Voxels(np.bitwise_or(self.packed(), other.packed()), self.dims, self.translate, self.scale)
+
+    def intersection(self, other):
+        """ Intersection with another model of the same dims, in packed
+        representation.
+        """
+        assert list(self.dims) == list(other.dims)
+        return Voxels(np.bitwise_and(self.packed(), other.packed()), self.dims, self.translate, self.scale)
+
+    def iou(self, other):
+        """ Intersection over union with another model of the same dims,
+        computed on the packed representation; 0 if both are empty.
+        """
+        assert list(self.dims) == list(other.dims)
+        packed, other_packed = self.packed(), other.packed()
+        union = packed_count(np.bitwise_or(packed, other_packed))
+        if union == 0:
+            return 0.
+        return packed_count(np.bitwise_and(packed, other_packed)) / float(union)
+
+class LazyVoxels(Voxels):
+    """ Holds a binvox model whose data is decoded on first access.
+
+    The run-length encoded data is kept as is (usually memory-mapped, see
+    read_as_lazy_array); dims, translate and scale are available without
+    decoding, and the number of occupied voxels can be computed from the runs
+    directly.
+    """
+
+    def __init__(self, raw_data, dims, translate, scale):
+        self.raw_data = raw_data
+        self._data = None
+        Voxels.__init__(self, None, dims, translate, scale)
+
+    @property
+    def data(self):
+        if self._data is None and self.raw_data is not None:
+            values, counts = self.raw_data[::2], self.raw_data[1::2]
+            self._data = np.repeat(values, counts).astype(bool).reshape(self.dims)
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+
+    def count(self):
+        """ Number of occupied voxels, computed without decoding unless the
+        data has been decoded or set already.
+        """
+        if self._data is not None or self.raw_data is None:
+            return Voxels.count(self)
+        values, counts = self.raw_data[::2], self.raw_data[1::2]
+        return int(np.sum(counts[values > 0], dtype=np.int64))
+
+    def packed(self):
+        """ Decode into a bit-packed buffer as returned by np.packbits on the
+        flattened data, without the intermediate byte-per-voxel array.
+        """
+        if self._data is not None or self.raw_data is None:
+            return Voxels.packed(self)
+        values, counts = self.raw_data[::2], self.raw_data[1::2]
+        return runs_to_packed(values, counts, int(np.prod(self.dims)))
+
 def read_header(fp):
     """ Read binvox header. Mostly meant for internal use.
     """
@@ -138,11 +223,39 @@ def read_as_3d_array(fp):
     # j -> y
     # k -> z
     values, counts = raw_data[::2], raw_data[1::2]
-    data = np.repeat(values, counts).astype(np.bool)
+    data = np.repeat(values, counts).astype(bool)
     data = data.reshape(dims)
 
     return Voxels(data, dims, translate, scale)
 
+def read_as_lazy_array(fp):
+    """ Read binary binvox format lazily.
+
+    Only the header is parsed; the run-length encoded data is memory-mapped
+    and only decoded when the data of the returned LazyVoxels is accessed.
+    fp needs to be a real file opened in binary mode, it may be closed
+    afterwards.
+    """
+    dims, translate, scale = read_header(fp)
+    offset = fp.tell()
+    mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    raw_data = np.frombuffer(mapped, dtype=np.uint8, offset=offset)
+
+    return LazyVoxels(raw_data, dims, translate, scale)
+
+def read_as_packed_array(fp):
+    """ Read binary binvox format as bit-packed array.
+
+    Voxels are stored in the packed representation, i.e. 8 voxels per byte,
+    and decoded directly from the runs without a byte-per-voxel intermediate.
+    """
+    dims, translate, scale = read_header(fp)
+    raw_data = np.frombuffer(fp.read(), dtype=np.uint8)
+    values, counts = raw_data[::2], raw_data[1::2]
+    data = runs_to_packed(values, counts, int(np.prod(dims)))
+
+    return Voxels(data, dims, translate, scale)
+
 def read_as_coord_array(fp, fix_coords=True):
     """ Read binary binvox format as coordinates.
 
@@ -162,34 +275,109 @@ def read_as_coord_array(fp, fix_coords=True):
 
     values, counts = raw_data[::2], raw_data[1::2]
 
-    sz = np.prod(dims)
-    index, end_index = 0, 0
-    end_indices = np.cumsum(counts)
-    indices = np.concatenate(([0], end_indices[:-1])).astype(end_indices.dtype)
+    end_indices = np.cumsum(counts, dtype=np.int64)
+    indices = end_indices - counts
 
-    values = values.astype(np.bool)
+    values = values.astype(bool)
     indices = indices[values]
-    end_indices = end_indices[values]
+    lengths = counts[values].astype(np.int64)
 
-    nz_voxels = []
-    for index, end_index in zip(indices, end_indices):
-        nz_voxels.extend(range(index, end_index))
-    nz_voxels = np.array(nz_voxels)
+    # expand the runs without building a list: within the i-th run, the k-th
+    # voxel has index indices[i] + k, i.e. its position in the output minus the
+    # number of nonzero voxels in all previous runs plus indices[i]
+    offsets = np.cumsum(lengths) - lengths
+    nz_voxels = np.arange(np.sum(lengths), dtype=np.int64) + np.repeat(indices - offsets, lengths)
     # TODO are these dims correct?
     # according to docs,
     # index = x * wxh + z * width + y; // wxh = width * height = d * d
 
-    x = nz_voxels / (dims[0]*dims[1])
-    zwpy = nz_voxels % (dims[0]*dims[1]) # z*w + y
-    z = zwpy / dims[0]
-    y = zwpy % dims[0]
+    x, zwpy = np.divmod(nz_voxels, dims[0]*dims[1]) # z*w + y
+    z, y = np.divmod(zwpy, dims[0])
 
     data = np.vstack((x, y, z))
 
     #return Voxels(data, dims, translate, scale)
     return Voxels(np.ascontiguousarray(data), dims, translate, scale)
 
-def dense_to_sparse(voxel_data, dtype=np.int):
+def runs_to_packed(values, counts, size):
+    """ Decode runs into a bit-packed buffer, i.e. the result of np.packbits
+    on the decoded data, using memory proportional to size/8.
+    """
+    values = np.asarray(values)
+    counts = np.asarray(counts, dtype=np.int64)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    occupied = (values > 0) & (counts > 0)
+    starts, ends = starts[occupied], ends[occupied]
+
+    packed = np.zeros((size + 7)//8, dtype=np.uint8)
+
+    # bytes fully covered by a run; runs are disjoint and sorted, so the
+    # running sum over +1/-1 markers is either 0 or 1
+    full_starts = (starts + 7)//8
+    full_ends = ends//8
+    full = full_ends > full_starts
+    markers = np.zeros(packed.shape[0] + 1, dtype=np.int8)
+    markers[full_starts[full]] += 1
+    markers[full_ends[full]] -= 1
+    packed[np.cumsum(markers[:-1], dtype=np.int8) > 0] = 255
+
+    # partially covered bytes at the beginning and end of runs,
+    # the first voxel of a byte corresponds to its highest bit
+    def bits(k, a, b):
+        return ((255 >> (a - 8*k)) & (255 << (8 - (b - 8*k)))) & 255
+
+    k = starts//8
+    np.bitwise_or.at(packed, k, bits(k, starts, np.minimum(ends, 8*k + 8)).astype(np.uint8))
+    k = (ends - 1)//8
+    np.bitwise_or.at(packed, k, bits(k, np.maximum(starts, 8*k), ends).astype(np.uint8))
+
+    return packed
+
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+""" Number of set bits for each byte value. """
+
+def packed_count(packed):
+    """ Number of set bits in a bit-packed array.
+    """
+    return int(np.sum(POPCOUNT[packed], dtype=np.int64))
+
+def dense_to_packed(voxel_data):
+    """ From dense representation to packed representation (8 voxels per byte).
+    """
+    if voxel_data.ndim!=3:
+        raise ValueError('voxel_data is wrong shape; should be 3D array.')
+    return np.packbits(voxel_data.astype(bool).ravel())
+
+def packed_to_dense(packed, dims, dtype=bool):
+    """ From packed representation to dense representation.
+    """
+    if np.isscalar(dims):
+        dims = [dims]*3
+    size = int(np.prod(dims))
+    return np.unpackbits(packed)[:size].reshape(dims).astype(dtype)
+
+def sparse_to_packed(voxel_data, dims):
+    """ From sparse (coordinate) representation to packed representation,
+    without going through the dense representation.
+    """
+    if np.isscalar(dims):
+        dims = [dims]*3
+    values, lengths = sparse_to_runs(voxel_data, dims)
+    return runs_to_packed(values, lengths, int(np.prod(dims)))
+
+def packed_to_sparse(packed, dims, dtype=np.int64):
+    """ From packed representation to sparse (coordinate) representation; only
+    nonzero bytes are unpacked. Coordinates are ordered as by dense_to_sparse.
+    """
+    if np.isscalar(dims):
+        dims = [dims]*3
+    nonzero = np.flatnonzero(packed)
+    bits = np.unpackbits(packed[nonzero]).reshape(-1, 8).astype(bool)
+    linear = (nonzero.reshape(-1, 1)*8 + np.arange(8))[bits]
+    return np.asarray(np.unravel_index(linear, dims), dtype)
+
+def dense_to_sparse(voxel_data, dtype=int):
     """ From dense representation to sparse (coordinate) representation.
     No coordinate reordering.
     """
@@ -197,14 +385,14 @@ def dense_to_sparse(voxel_data, dtype=np.int):
         raise ValueError('voxel_data is wrong shape; should be 3D array.')
     return np.asarray(np.nonzero(voxel_data), dtype)
 
-def sparse_to_dense(voxel_data, dims, dtype=np.bool):
+def sparse_to_dense(voxel_data, dims, dtype=bool):
     if voxel_data.ndim!=2 or voxel_data.shape[0]!=3:
         raise ValueError('voxel_data is wrong shape; should be 3xN array.')
     if np.isscalar(dims):
         dims = [dims]*3
     dims = np.atleast_2d(dims).T
     # truncate to integers
-    xyz = voxel_data.astype(np.int)
+    xyz = voxel_data.astype(int)
     # discard voxels that fall outside dims
     valid_ix = ~np.any((xyz < 0) | (xyz >= dims), 0)
     xyz = xyz[:,valid_ix]
@@ -218,50 +406,103 @@ def sparse_to_dense(voxel_data, dims, dtype=np.bool):
     #"""
     #return x*(dims[1]*dims[2]) + z*dims[1] + y
 
+def encode_runs(values, lengths):
+    """ Encode runs as binvox (value, count) byte pairs, splitting runs longer
+    than 255 voxels. Mostly meant for internal use.
+
+    values and lengths are one-dimensional arrays; returns the encoded bytes.
+    """
+    values = np.asarray(values, dtype=np.uint8)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    values, lengths = values[lengths > 0], lengths[lengths > 0]
+
+    # every run is split into pieces of 255 voxels, only the last piece of each
+    # run holds the remainder
+    pieces = (lengths + 254) // 255
+    last = np.cumsum(pieces) - 1
+
+    counts = np.full(int(np.sum(pieces)), 255, dtype=np.uint8)
+    counts[last] = lengths - 255*(pieces - 1)
+
+    encoded = np.empty(2*counts.shape[0], dtype=np.uint8)
+    encoded[0::2] = np.repeat(values, pieces)
+    encoded[1::2] = counts
+    return encoded.tobytes()
+
+def dense_to_runs(voxels_flat):
+    """ Find the runs of a flattened dense voxel array.
+    Returns values and lengths of the runs.
+    """
+    voxels_flat = np.asarray(voxels_flat, dtype=np.uint8)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(voxels_flat)) + 1))
+    lengths = np.diff(np.concatenate((starts, [voxels_flat.shape[0]])))
+    return voxels_flat[starts], lengths
+
+def sparse_to_runs(voxel_data, dims):
+    """ Find the runs of a sparse (coordinate) representation without converting
+    it to dense; memory scales with the number of voxels, not the volume.
+    Coordinates are interpreted as in sparse_to_dense.
+    Returns values and lengths of the runs.
+    """
+    if voxel_data.ndim!=2 or voxel_data.shape[0]!=3:
+        raise ValueError('voxel_data is wrong shape; should be 3xN array.')
+    if np.isscalar(dims):
+        dims = [dims]*3
+    dims = np.asarray(dims, dtype=np.int64)
+    # truncate to integers
+    xyz = voxel_data.astype(np.int64)
+    # discard voxels that fall outside dims
+    valid_ix = ~np.any((xyz < 0) | (xyz >= dims.reshape(3, 1)), 0)
+    xyz = xyz[:,valid_ix]
+
+    linear = np.unique(xyz[0]*dims[1]*dims[2] + xyz[1]*dims[2] + xyz[2])
+    size = int(np.prod(dims))
+
+    if linear.shape[0] == 0:
+        return np.zeros(1, dtype=np.uint8), np.array([size], dtype=np.int64)
+
+    # occupied runs are maximal sequences of consecutive linear indices,
+    # the empty runs are the gaps in between
+    breaks = np.flatnonzero(np.diff(linear) > 1) + 1
+    starts = linear[np.concatenate(([0], breaks))]
+    ends = linear[np.concatenate((breaks - 1, [linear.shape[0] - 1]))] + 1
+
+    values = np.zeros(2*starts.shape[0] + 1, dtype=np.uint8)
+    values[1::2] = 1
+    lengths = np.zeros(2*starts.shape[0] + 1, dtype=np.int64)
+    lengths[0:-1:2] = starts - np.concatenate(([0], ends[:-1]))
+    lengths[1::2] = ends - starts
+    lengths[-1] = size - ends[-1]
+    return values, lengths
+
+def write_header(voxel_model, fp):
+    """ Write binvox header. Mostly meant for internal use.
+    """
+    fp.write(b'#binvox 1\n')
+    fp.write(('dim '+' '.join(map(str, voxel_model.dims))+'\n').encode('ascii'))
+    fp.write(('translate '+' '.join(map(str, voxel_model.translate))+'\n').encode('ascii'))
+    fp.write(('scale '+str(voxel_model.scale)+'\n').encode('ascii'))
+    fp.write(b'data\n')
+
 def write(voxel_model, fp):
-    """ Write binary binvox format.
+    """ Write binary binvox format; fp needs to be opened in binary mode.
 
-    Note that when saving a model in sparse (coordinate) format, it is first
-    converted to dense format.
+    Models in sparse (coordinate) format are encoded directly from the sorted
+    voxel indices, without converting them to dense format.
 
     Doesn't check if the model is 'sane'.
 
     """
+    write_header(voxel_model, fp)
+
     if voxel_model.data.ndim==2:
-        # TODO avoid conversion to dense
-        dense_voxel_data = sparse_to_dense(voxel_model.data, voxel_model.dims)
+        values, lengths = sparse_to_runs(voxel_model.data, voxel_model.dims)
+    elif voxel_model.data.ndim==1:
+        size = int(np.prod(voxel_model.dims))
+        values, lengths = dense_to_runs(np.unpackbits(voxel_model.data)[:size])
     else:
-        dense_voxel_data = voxel_model.data
-
-    fp.write('#binvox 1\n')
-    fp.write('dim '+' '.join(map(str, voxel_model.dims))+'\n')
-    fp.write('translate '+' '.join(map(str, voxel_model.translate))+'\n')
-    fp.write('scale '+str(voxel_model.scale)+'\n')
-    fp.write('data\n')
-
-    voxels_flat = dense_voxel_data.flatten()
-
-    # keep a sort of state machine for writing run length encoding
-    state = voxels_flat[0]
-    ctr = 0
-    for c in voxels_flat:
-        if c==state:
-            ctr += 1
-            # if ctr hits max, dump
-            if ctr==255:
-                fp.write(chr(state))
-                fp.write(chr(ctr))
-                ctr = 0
-        else:
-            # if switch state, dump
-            fp.write(chr(state))
-            fp.write(chr(ctr))
-            state = c
-            ctr = 1
-    # flush out remainders
-    if ctr > 0:
-        fp.write(chr(state))
-        fp.write(chr(ctr))
+        values, lengths = dense_to_runs(voxel_model.data.flatten())
+    fp.write(encode_runs(values, lengths))
 
 if __name__ == '__main__':
     import doctest
@@ -54,11 +54,15 @@ import math
 import numpy as np
 
 import binvox_rw
+import geometry
+import point_cloud
 import import_off
 import_off.register()
 
 sphere_base_mesh = None
 cube_base_mesh = None
+sphere_base_arrays = {}
+geometry_cache = None
 
 
 def initialize(width=512, height=448):
@@ -217,6 +221,174 @@ def make_material(name, diffuse, alpha, shadow=False):
     return material
 
 
+def get_mesh_arrays(mesh):
+    """
+    Get the vertices and faces of a Blender mesh as NumPy arrays; all faces
+    are expected to have the same number of vertices.
+
+    :param mesh: Blender mesh
+    :return: vertices as V x 3 array, faces as F x K array
+    """
+
+    vertices = np.zeros(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', vertices)
+
+    loop_totals = np.zeros(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    assert np.all(loop_totals == loop_totals[0]), 'only meshes with faces of equal size supported'
+
+    faces = np.zeros(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', faces)
+
+    return vertices.reshape(-1, 3), faces.reshape(-1, loop_totals[0])
+
+
+def make_mesh(name, vertices, faces, smooth=False):
+    """
+    Creates a Blender mesh from vertices and faces given as NumPy arrays.
+    All data is pushed using foreach_set, i.e. without any per-vertex Python calls.
+
+    :param name: name of mesh
+    :param vertices: vertices as V x 3 array
+    :param faces: faces as F x K array of vertex indices
+    :param smooth: whether to use smooth shading
+    :return: mesh
+    """
+
+    vertices = np.asarray(vertices, dtype=np.float32)
+    faces = np.asarray(faces, dtype=np.int32)
+    num_faces, face_size = faces.shape
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(vertices.shape[0])
+    mesh.vertices.foreach_set('co', vertices.ravel())
+
+    mesh.loops.add(faces.size)
+    mesh.loops.foreach_set('vertex_index', faces.ravel())
+
+    mesh.polygons.add(num_faces)
+    mesh.polygons.foreach_set('loop_start', np.arange(0, faces.size, face_size, dtype=np.int32))
+    mesh.polygons.foreach_set('loop_total', np.full(num_faces, face_size, dtype=np.int32))
+    mesh.polygons.foreach_set('use_smooth', np.full(num_faces, smooth, dtype=bool))
+
+    mesh.update(calc_edges=True)
+    mesh.validate()
+
+    return mesh
+
+
+def enable_geometry_cache(directory, max_size=2*1024**3):
+    """
+    Enable the on-disk cache for the geometry generated by load_txt and load_binvox, see geometry.GeometryCache.
+    Geometry is cached per input file content and parameters, such that rendering the same input again,
+    e.g. with different views or materials, does not need to generate the geometry again.
+
+    Computing the key hashes the whole input file on every load; PCB files are an exception, for which
+    only size, modification time and header are hashed such that loading a subset still reads only the
+    selected points.
+
+    :param directory: cache directory
+    :param max_size: maximum size of the cache in bytes
+    """
+
+    global geometry_cache
+    geometry_cache = geometry.GeometryCache(directory, max_size)
+
+
+def build_geometry(build, filepath, **parameters):
+    """
+    Build geometry using the given function, or load it from the geometry cache if enabled.
+
+    :param build: function returning vertices and faces
+    :param filepath: path to input file
+    :param parameters: parameters the geometry depends on
+    :return: vertices and faces
+    """
+
+    if geometry_cache is None:
+        return build()
+
+    header_size = point_cloud.PCB_HEADER_SIZE if filepath.endswith('.pcb') else None
+    key = geometry_cache.key(filepath, header_size, **parameters)
+    cached = geometry_cache.load(key)
+    if cached is not None:
+        return cached
+
+    vertices, faces = build()
+    geometry_cache.save(key, vertices, faces)
+    return vertices, faces
+
+
+def select_point_lod(num_points, radius, distance=0.5, max_triangles=20000000):
+    """
+    Select the level of detail used for the points of a point cloud, based on the size of the
+    points in pixels (given the output resolution and the camera distance used in render) and
+    on the number of points.
+
+    Points covering only a few pixels are rendered as cubes or low-resolution spheres; additionally,
+    the level of detail is reduced until the point cloud has at most max_triangles triangles.
+
+    :param num_points: number of points
+    :param radius: radius of points
+    :param distance: distance to target as passed to render
+    :param max_triangles: maximum number of triangles of the point cloud
+    :return: 'cube' or subdivisions of the ico sphere
+    """
+
+    # The camera is located at (0, 3, 1) * distance and the horizontal field of view
+    # follows from the sensor width of 32 and the focal length of 35, see initialize.
+    camera_distance = distance * math.sqrt(10)
+    resolution_x = bpy.context.scene.render.resolution_x * bpy.context.scene.render.resolution_percentage / 100.
+    pixels = radius / (camera_distance * 16. / 35.) * resolution_x / 2.
+
+    if pixels < 1.5:
+        lod = 0
+    elif pixels < 4:
+        lod = 1
+    elif pixels < 12:
+        lod = 2
+    else:
+        lod = 3
+
+    # Triangles per point for the cube and the ico spheres with 1, 2 and 3 subdivisions.
+    triangles = [12, 20, 80, 320]
+    while lod > 0 and num_points * triangles[lod] > max_triangles:
+        lod -= 1
+
+    return 'cube' if lod == 0 else lod
+
+
+def get_point_base_arrays(lod):
+    """
+    Get the base mesh used for the points of a point cloud as NumPy arrays.
+
+    :param lod: None for the default sphere, 'cube' or subdivisions of the ico sphere
+    :return: vertices and faces, faces are quads for the cube and triangles for spheres
+    """
+
+    if lod is None:
+        return get_mesh_arrays(sphere_base_mesh)
+    elif lod == 'cube':
+        return get_mesh_arrays(cube_base_mesh)
+
+    assert lod >= 1
+    if not lod in sphere_base_arrays:
+        bm = bmesh.new()
+        bmesh.ops.create_icosphere(bm, subdivisions=lod, diameter=1)
+        mesh = bpy.data.meshes.new('BRC_Sphere_%d' % lod)
+        bm.to_mesh(mesh)
+        bm.free()
+
+        vertices, faces = get_mesh_arrays(mesh)
+        bpy.data.meshes.remove(mesh)
+
+        # Make sure the sphere has unit radius like sphere_base_mesh.
+        vertices = vertices / np.linalg.norm(vertices, axis=1, keepdims=True)
+        sphere_base_arrays[lod] = (vertices, faces)
+
+    return sphere_base_arrays[lod]
+
+
 def load_off(off_file, material, offset=(0, 0, 0), scale=1, axes='xyz'):
     """
     Loads a triangular mesh from an OFF file. For pre-processing, mesh.py can be used;
@@ -262,34 +434,51 @@ def load_off(off_file, material, offset=(0, 0, 0), scale=1, axes='xyz'):
             # but needed changing a lot of attributes according to documentation
             obj.data.materials.append(material)
 
-            for vertex in obj.data.vertices:
-                # make a copy, otherwise axes switching does not work
-                vertex_copy = (vertex.co[0], vertex.co[1], vertex.co[2])
-
-                # First, swap the axes, then scale and offset.
-                vertex.co[0] = vertex_copy[x_index]
-                vertex.co[1] = vertex_copy[y_index]
-                vertex.co[2] = vertex_copy[z_index]
-
-                vertex.co[0] = vertex.co[0] * scale + offset[0]
-                vertex.co[1] = vertex.co[1] * scale + offset[1]
-                vertex.co[2] = vertex.co[2] * scale + offset[2]
+            # All coordinates are transformed at once; first, swap the axes, then scale and offset.
+            vertices = np.zeros(len(obj.data.vertices)*3, dtype=np.float32)
+            obj.data.vertices.foreach_get('co', vertices)
+            vertices = vertices.reshape(-1, 3)[:, [x_index, y_index, z_index]] * scale + np.array(offset)
+            obj.data.vertices.foreach_set('co', vertices.astype(np.float32).ravel())
+            obj.data.update()
 
             obj.name = 'BRC_' + obj.name
 
 
-def load_txt(txt_file, radius, material, offset=(0, 0, 0), scale=1, axes='xyz'):
+def load_txt(txt_file, radius, material, offset=(0, 0, 0), scale=1, axes='xyz', mode='numpy', lod=None, distance=0.5,
+             downsample=False, subset=None):
     """
-    Load a point cloud from txt file, see the documentation for the format.
+    Load a point cloud from txt file, see the documentation for the format; binary point clouds
+    (PCB files, see point_cloud.write_pcb) are supported as well and are memory-mapped.
     Additionally, the radius of the points, an offset and a scale can be defined, for details
     on the parameters also see load_off.
 
+    Only a subset of the points can be loaded by passing a slice, e.g. slice(0, 1000) for the first
+    1000 points or slice(None, None, 10) for every 10th point; for PCB files, only these points are read.
+
+    The mode defines how the spheres are built: 'numpy' builds all spheres at once as
+    NumPy arrays and pushes them into a single mesh, 'instancing' only creates a mesh with
+    one vertex per point and instances a single sphere on these vertices (dupli-verts),
+    such that memory grows with the number of points only, and 'bmesh' copies the sphere
+    per point (slow, mostly kept for reference).
+
+    The level of detail of the points is either the default sphere (None), 'cube', the number of
+    subdivisions of an ico sphere or 'auto' to select it based on the number of points and their size
+    in pixels, see select_point_lod; it is not supported by the 'bmesh' mode.
+
+    If downsample is true, the points are quantized to a grid with cell size equal to the radius
+    and only one point per cell is rendered, see point_cloud.PointCloud.downsample.
+
     :param txt_file: path to TXT file
     :param radius: radius of rendered points/spheres
     :param material: previously defined material
     :param offset: offset
     :param scale: scale
     :param axes: axes definition
+    :param mode: 'numpy', 'instancing' or 'bmesh'
+    :param lod: None, 'cube', subdivisions or 'auto'
+    :param distance: distance to target as passed to render, only used with lod 'auto'
+    :param downsample: whether to keep only one point per grid cell of size radius
+    :param subset: slice of points to load
     :return:
     """
 
@@ -298,6 +487,13 @@ def load_txt(txt_file, radius, material, offset=(0, 0, 0), scale=1, axes='xyz'):
     assert len(offset) == 3
     assert scale > 0
     assert len(axes) == 3
+    assert mode in ['numpy', 'instancing', 'bmesh']
+    assert lod is None or mode != 'bmesh'
+
+    subset_key = None if subset is None else [subset.start, subset.stop, subset.step]
+
+    def resolve_lod(num_points):
+        return select_point_lod(num_points, radius, distance) if lod == 'auto' else lod
 
     x_index = axes.find('x')
     y_index = axes.find('y')
@@ -308,20 +504,47 @@ def load_txt(txt_file, radius, material, offset=(0, 0, 0), scale=1, axes='xyz'):
     assert z_index >= 0 and z_index < 3
     assert x_index != y_index and x_index != z_index and y_index != z_index
 
-    voxel_file = open(txt_file, 'r')
-    voxel_lines = voxel_file.readlines()
-    voxel_file.close()
-
-    mesh = bmesh.new()
-    for line in voxel_lines:
-        vals = line.split(' ')
-        if not line.startswith('#') and line.strip() != '' and len(vals) >= 3:
-            location = (
-                float(vals[x_index]) * scale + offset[0],
-                float(vals[y_index]) * scale + offset[1],
-                float(vals[z_index]) * scale + offset[2]
-            )
-
+    def read_locations():
+        if txt_file.endswith('.pcb'):
+            data, _ = point_cloud.read_pcb(txt_file)
+        else:
+            data = point_cloud.read_txt(txt_file)
+
+        if subset is not None:
+            data = data[subset]
+
+        locations = data[:, [x_index, y_index, z_index]].astype(float) * scale + np.array(offset)
+
+        if downsample:
+            locations = point_cloud.PointCloud(locations).downsample(radius).points
+
+        return locations
+
+    if mode == 'numpy':
+        def build():
+            locations = read_locations()
+            base_vertices, base_faces = get_point_base_arrays(resolve_lod(len(locations)))
+            return geometry.instance_geometry(base_vertices, base_faces, locations, radius)
+
+        resolution = (bpy.context.scene.render.resolution_x, bpy.context.scene.render.resolution_percentage)
+        vertices, faces = build_geometry(build, txt_file, loader='txt', radius=radius, offset=list(offset),
+                                         scale=scale, axes=axes, mode=mode, lod=lod, downsample=downsample, subset=subset_key,
+                                         distance=distance if lod == 'auto' else None,
+                                         resolution=resolution if lod == 'auto' else None)
+
+        # Only the cube has quads, spheres are smooth shaded.
+        mesh2 = make_mesh('Mesh', vertices, faces, smooth=faces.shape[1] == 3)
+    elif mode == 'instancing':
+        def build():
+            return read_locations(), np.zeros((0, 3), dtype=int)
+
+        vertices, faces = build_geometry(build, txt_file, loader='txt', offset=list(offset), scale=scale,
+                                         axes=axes, mode=mode, downsample=downsample, subset=subset_key,
+                                         radius=radius if downsample else None)
+        mesh2 = make_mesh('Mesh', vertices, faces)
+    else:
+        mesh = bmesh.new()
+        for location in read_locations():
             m = sphere_base_mesh.copy()
             for vertex in m.vertices:
                 vertex.co[0] = vertex.co[0] * radius + location[0]
@@ -330,8 +553,8 @@ def load_txt(txt_file, radius, material, offset=(0, 0, 0), scale=1, axes='xyz'):
 
             mesh.from_mesh(m)
 
-    mesh2 = bpy.data.meshes.new('Mesh')
-    mesh.to_mesh(mesh2)
+        mesh2 = bpy.data.meshes.new('Mesh')
+        mesh.to_mesh(mesh2)
 
     obj = bpy.data.objects.new('BRC_Point_Cloud', mesh2)
     obj.data.materials.append(material)
@@ -340,18 +563,40 @@ def load_txt(txt_file, radius, material, offset=(0, 0, 0), scale=1, axes='xyz'):
 
     bpy.context.scene.objects.link(obj)
 
+    if mode == 'instancing':
+        # The sphere is instanced on all vertices of the point cloud mesh;
+        # the sphere object itself is not rendered.
+        point_lod = resolve_lod(vertices.shape[0])
+        base_vertices, base_faces = get_point_base_arrays(point_lod)
+        sphere = bpy.data.objects.new('BRC_Point_Cloud_Sphere', make_mesh('Mesh', base_vertices, base_faces, smooth=point_lod != 'cube'))
+        sphere.scale = (radius, radius, radius)
+        sphere.data.materials.append(material)
+        sphere.active_material_index = 0
+        sphere.active_material = material
+        sphere.parent = obj
+        obj.dupli_type = 'VERTS'
+
+        bpy.context.scene.objects.link(sphere)
 
-def load_binvox(binvox_file, radius, material, offset, scale, axes):
+
+def load_binvox(binvox_file, radius, material, offset, scale, axes, mode='numpy'):
     """
     Load a binvox file, see binvox_rw.py for format. Again, radius of the cubes, material, offset and scale
     can be defined as in load_off.
 
+    The mode defines how the cubes are built: 'numpy' builds all cubes at once as NumPy arrays,
+    'culled' only builds the faces between occupied and empty voxels, 'greedy' additionally merges
+    coplanar adjacent faces into larger quads and 'bmesh' copies the cube per voxel (slow, mostly
+    kept for reference). As culled faces are only hidden if neighbouring cubes touch, 'culled' and
+    'greedy' ignore the radius and size the cubes by the voxel size after scaling instead.
+
     :param binvox_file: path to binvox file
-    :param radius: radius, i.e. side length, of cubes
+    :param radius: radius, i.e. side length, of cubes; not used by 'culled' and 'greedy'
     :param material: previously defined material
     :param offset: offset
     :param scale: scale
     :param axes: axes definition
+    :param mode: 'numpy', 'culled', 'greedy' or 'bmesh'
     :return:
     """
 
@@ -360,6 +605,7 @@ def load_binvox(binvox_file, radius, material, offset, scale, axes):
     assert len(offset) == 3
     assert len(scale) == 3
     assert len(axes) == 3
+    assert mode in ['numpy', 'culled', 'greedy', 'bmesh']
 
     x_index = axes.find("x")
     y_index = axes.find("y")
@@ -370,24 +616,53 @@ def load_binvox(binvox_file, radius, material, offset, scale, axes):
     assert z_index >= 0 and z_index < 3
     assert x_index != y_index and x_index != z_index and y_index != z_index
 
-    with open(binvox_file, 'rb') as f:
-        model = binvox_rw.read_as_3d_array(f)
-
-    points = np.where(model.data)
-    locations = np.zeros((points[0].shape[0], 3), dtype=float)
-    locations[:, 0] = (points[x_index][:] + 0.5) / model.data.shape[x_index]
-    locations[:, 1] = (points[y_index][:] + 0.5) / model.data.shape[y_index]
-    locations[:, 2] = (points[z_index][:] + 0.5) / model.data.shape[z_index]
-    locations[:, 0] -= 0.5
-    locations[:, 1] -= 0.5
-    locations[:, 2] -= 0.5
-
-    locations[:, 0] = locations[:, 0] * scale[0] + offset[0]
-    locations[:, 1] = locations[:, 1] * scale[1] + offset[1]
-    locations[:, 2] = locations[:, 2] * scale[2] + offset[2]
-
-    mesh = bmesh.new()
-    for i in range(locations.shape[0]):
+    def read_model():
+        with open(binvox_file, 'rb') as f:
+            return binvox_rw.read_as_3d_array(f)
+
+    def read_locations():
+        model = read_model()
+
+        points = np.where(model.data)
+        locations = np.zeros((points[0].shape[0], 3), dtype=float)
+        locations[:, 0] = (points[x_index][:] + 0.5) / model.data.shape[x_index]
+        locations[:, 1] = (points[y_index][:] + 0.5) / model.data.shape[y_index]
+        locations[:, 2] = (points[z_index][:] + 0.5) / model.data.shape[z_index]
+        locations[:, 0] -= 0.5
+        locations[:, 1] -= 0.5
+        locations[:, 2] -= 0.5
+
+        locations[:, 0] = locations[:, 0] * scale[0] + offset[0]
+        locations[:, 1] = locations[:, 1] * scale[1] + offset[1]
+        locations[:, 2] = locations[:, 2] * scale[2] + offset[2]
+
+        return locations
+
+    if mode == 'culled' or mode == 'greedy':
+        def build():
+            # Transposing the grid makes its axes correspond to x, y and z.
+            occupancy = np.transpose(read_model().data, (x_index, y_index, z_index))
+
+            # The cubes need to touch such that no culled face is visible.
+            pitch = [scale[c] / occupancy.shape[c] / 2 for c in range(3)]
+            return geometry.occupancy_geometry(occupancy, pitch, offset, scale, mode == 'greedy')
+
+        vertices, faces = build_geometry(build, binvox_file, loader='binvox', offset=list(offset),
+                                         scale=list(scale), axes=axes, mode=mode)
+        mesh2 = make_mesh('Mesh', vertices, faces)
+    elif mode == 'numpy':
+        def build():
+            base_vertices, base_faces = get_mesh_arrays(cube_base_mesh)
+            return geometry.instance_geometry(base_vertices, base_faces, read_locations(), radius)
+
+        vertices, faces = build_geometry(build, binvox_file, loader='binvox', radius=radius, offset=list(offset),
+                                         scale=list(scale), axes=axes, mode=mode)
+        mesh2 = make_mesh('Mesh', vertices, faces)
+    else:
+        locations = read_locations()
+
+        mesh = bmesh.new()
+        for i in range(locations.shape[0]):
             m = cube_base_mesh.copy()
             for vertex in m.vertices:
                 vertex.co[0] = vertex.co[0] * radius + locations[i, 0]
@@ -396,8 +671,8 @@ def load_binvox(binvox_file, radius, material, offset, scale, axes):
 
             mesh.from_mesh(m)
 
-    mesh2 = bpy.data.meshes.new('Mesh')
-    mesh.to_mesh(mesh2)
+        mesh2 = bpy.data.meshes.new('Mesh')
+        mesh.to_mesh(mesh2)
 
     obj = bpy.data.objects.new('BRC_Occupancy', mesh2)
     obj.data.materials.append(material)
@@ -407,6 +682,20 @@ def load_binvox(binvox_file, radius, material, offset, scale, axes):
     bpy.context.scene.objects.link(obj)
 
 
+def clear():
+    """
+    Remove all loaded objects, i.e. all objects whose name contains BRC, together with their meshes.
+    Camera, lamps, world and materials are kept such that the scene can be reused for the next input.
+    """
+
+    for obj in list(bpy.data.objects):
+        if obj.type == 'MESH' and 'BRC' in obj.name:
+            mesh = obj.data
+            bpy.data.objects.remove(obj, do_unlink=True)
+            if mesh.users == 0:
+                bpy.data.meshes.remove(mesh)
+
+
 def render(camera_target, output_file, rotation, distance):
     """
     Render all loaded objects into the given object files. Additionally, the
@@ -430,3 +719,82 @@ def render(camera_target, output_file, rotation, distance):
     cam.location = (0, 3.0 * distance, 1.0 * distance)
 
     bpy.ops.render.render(animation=False, write_still=True)
+
+
+def turntable_views(azimuths, rotation=(5, 0, -55), distance=0.5):
+    """
+    Views evenly distributed on a turntable, i.e. the rotation around the z axis is varied
+    starting from the given rotation.
+
+    :param azimuths: number of views
+    :param rotation: rotation of first view
+    :param distance: distance to target
+    :return: list of (rotation, distance)
+    """
+
+    assert azimuths > 0
+    return [((rotation[0], rotation[1], rotation[2] + i * 360.0 / azimuths), distance) for i in range(azimuths)]
+
+
+def read_views(views_file, distance=0.5):
+    """
+    Read views from a file with one view per line, consisting of the rotation around the
+    x, y and z axes and, optionally, the distance.
+
+    :param views_file: path to views file
+    :param distance: default distance to target
+    :return: list of (rotation, distance)
+    """
+
+    views = []
+    with open(views_file, 'r') as f:
+        for line in f:
+            vals = line.split()
+            if line.startswith('#') or len(vals) == 0:
+                continue
+
+            assert len(vals) == 3 or len(vals) == 4, 'invalid view: %s' % line
+            rotation = (float(vals[0]), float(vals[1]), float(vals[2]))
+            views.append((rotation, float(vals[3]) if len(vals) == 4 else distance))
+
+    return views
+
+
+def get_views(azimuths, views_file, rotation, distance):
+    """
+    Get the views to render given the command line options of the render scripts;
+    without azimuths and views file, only the given rotation and distance is used.
+
+    :param azimuths: number of views on a turntable, or 0
+    :param views_file: path to views file, or empty
+    :param rotation: rotation of camera
+    :param distance: distance to target
+    :return: list of (rotation, distance)
+    """
+
+    if views_file:
+        return read_views(views_file, distance)
+    elif azimuths > 0:
+        return turntable_views(azimuths, rotation, distance)
+    else:
+        return [(rotation, distance)]
+
+
+def render_views(camera_target, output_file, views):
+    """
+    Render all loaded objects from multiple views; the scene is set up only once
+    and only the camera is moved between the renders.
+
+    For more than one view, the output file needs to contain %d, which is replaced
+    by the index of the view.
+
+    :param camera_target: returned by initialize()
+    :param output_file: path to output file, containing %d for multiple views
+    :param views: list of (rotation, distance)
+    """
+
+    if len(views) > 1:
+        assert '%d' in output_file, 'output file needs to contain %d for multiple views'
+
+    for i, (rotation, distance) in enumerate(views):
+        render(camera_target, output_file % i if '%d' in output_file else output_file, rotation, distance)
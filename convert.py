@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing
+import numpy as np
+import ply
+import binvox_rw
+import geometry
+from mesh import Mesh
+from point_cloud import PointCloud
+from render_farm import find_inputs
+
+
+MESH_FORMATS = ['off', 'obj', 'ply']
+""" ([str]) Formats meshes can be written to. """
+
+INPUT_FORMATS = ['off', 'obj', 'ply', 'txt', 'pcb', 'binvox']
+""" ([str]) Supported input formats. """
+
+HASH_FILE = '.convert_hashes.json'
+""" (str) File in the output directory holding the output, options and hash (for --check hash) of every converted input. """
+
+
+def read_input(filepath):
+    """
+    Read a mesh, point cloud or occupancy grid depending on the extension;
+    PLY files without faces are read as point clouds.
+
+    :param filepath: path to input file
+    :type filepath: str
+    :return: mesh, point cloud or occupancy grid
+    :rtype: Mesh or PointCloud or binvox_rw.Voxels
+    """
+
+    extension = os.path.splitext(filepath)[1][1:].lower()
+    if extension == 'off':
+        return Mesh.from_off(filepath)
+    elif extension == 'obj':
+        return Mesh.from_obj(filepath)
+    elif extension == 'ply':
+        vertices, faces, _ = ply.read_ply(filepath)
+        if faces.shape[0] == 0:
+            return PointCloud(vertices)
+        return Mesh(vertices, faces)
+    elif extension == 'txt':
+        return PointCloud.from_txt(filepath)
+    elif extension == 'pcb':
+        return PointCloud.from_pcb(filepath)
+    elif extension == 'binvox':
+        with open(filepath, 'rb') as fp:
+            return binvox_rw.read_as_3d_array(fp)
+    else:
+        raise ValueError('unsupported input format %s' % extension)
+
+
+def occupancy_to_mesh(model):
+    """
+    Convert an occupancy grid to a triangular mesh of the visible voxel faces, see geometry.occupancy_geometry;
+    the mesh is in the coordinate frame given by the translation and scale of the model.
+
+    :param model: occupancy grid
+    :type model: binvox_rw.Voxels
+    :return: mesh
+    :rtype: Mesh
+    """
+
+    dims = np.array(model.dims, dtype=float)
+    scale = model.scale * dims / np.max(dims)
+    offset = np.array(model.translate, dtype=float) + scale / 2
+    radius = model.scale / np.max(dims) / 2
+
+    vertices, quads = geometry.occupancy_geometry(model.data, radius, offset, scale, greedy=True)
+    faces = np.concatenate((quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]), axis=0)
+    return Mesh(vertices, faces)
+
+
+def occupancy_to_point_cloud(model):
+    """
+    Convert an occupancy grid to a point cloud of the occupied voxel centers.
+
+    :param model: occupancy grid
+    :type model: binvox_rw.Voxels
+    :return: point cloud
+    :rtype: PointCloud
+    """
+
+    dims = np.array(model.dims, dtype=float)
+    indices = np.argwhere(model.data)
+    points = np.array(model.translate, dtype=float) + (indices + 0.5) * model.scale / np.max(dims)
+    return PointCloud(points)
+
+
+def write_output(data, filepath, binary=False):
+    """
+    Write a mesh, point cloud or occupancy grid in the format given by the extension.
+    Meshes written to TXT or PCB keep only their vertices; occupancy grids are written as
+    voxel faces (OFF, OBJ, PLY) or as voxel centers (TXT, PCB).
+
+    :param data: mesh, point cloud or occupancy grid as returned by read_input
+    :type data: Mesh or PointCloud or binvox_rw.Voxels
+    :param filepath: path to output file
+    :type filepath: str
+    :param binary: whether to write binary PLY
+    :type binary: bool
+    """
+
+    extension = os.path.splitext(filepath)[1][1:].lower()
+
+    if isinstance(data, binvox_rw.Voxels):
+        if extension in MESH_FORMATS:
+            data = occupancy_to_mesh(data)
+        else:
+            data = occupancy_to_point_cloud(data)
+
+    if isinstance(data, Mesh) and not extension in MESH_FORMATS:
+        data = PointCloud(data.vertices)
+
+    if isinstance(data, Mesh):
+        if extension == 'off':
+            data.to_off(filepath)
+        elif extension == 'obj':
+            data.to_obj(filepath)
+        else:
+            data.to_ply(filepath, binary)
+    else:
+        if extension == 'txt':
+            data.to_txt(filepath)
+        elif extension == 'pcb':
+            data.to_pcb(filepath)
+        elif extension == 'ply':
+            data.to_ply(filepath, binary)
+        else:
+            raise ValueError('cannot convert point cloud to %s' % extension)
+
+
+def file_hash(filepath):
+    """
+    Compute the SHA1 of the content of a file.
+
+    :param filepath: path to file
+    :type filepath: str
+    :return: hash
+    :rtype: str
+    """
+
+    sha1 = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024*1024), b''):
+            sha1.update(chunk)
+
+    return sha1.hexdigest()
+
+
+def convert_job(job):
+    """
+    Convert a single file unless the output is up to date; used as worker in the process pool.
+
+    :param job: input file, output file, whether to write binary PLY, check (mtime, hash or none)
+        and the record of the last conversion if it was written to the same output with the same options (or None)
+    :type job: (str, str, bool, str, dict)
+    :return: input file, status (converted, skipped or an error message) and hash of the input (or None)
+    :rtype: (str, str, str)
+    """
+
+    input_file, output_file, binary, check, previous = job
+
+    try:
+        input_hash = None
+        if check == 'hash':
+            input_hash = file_hash(input_file)
+            if os.path.exists(output_file) and previous is not None and input_hash == previous.get('hash'):
+                return input_file, 'skipped', input_hash
+        elif check == 'mtime':
+            if os.path.exists(output_file) and previous is not None \
+                    and os.path.getmtime(output_file) >= os.path.getmtime(input_file):
+                return input_file, 'skipped', input_hash
+
+        directory = os.path.dirname(output_file)
+        if directory and not os.path.exists(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Created by another worker in the meantime.
+                pass
+
+        write_output(read_input(input_file), output_file, binary)
+        return input_file, 'converted', input_hash
+    except Exception as e:
+        return input_file, 'error: %s' % str(e), None
+
+
+def main():
+    """
+    Convert many OFF, OBJ, PLY, TXT, PCB or BINVOX files in parallel.
+    """
+
+    parser = argparse.ArgumentParser(description='Converts many meshes, point clouds or occupancy grids in parallel.')
+    parser.add_argument('inputs', type=str, nargs='+', help='Input files, directories or glob patterns.')
+    parser.add_argument('--output', type=str, required=True, help='Output directory, the directory structure and extension of the inputs are kept (e.g. a/0.off becomes a/0.off.ply).')
+    parser.add_argument('--format', type=str, required=True, choices=['off', 'obj', 'ply', 'txt', 'pcb'], help='Output format.')
+    parser.add_argument('--from_format', type=str, default='', choices=[''] + INPUT_FORMATS, help='Only convert inputs of this format.')
+    parser.add_argument('--binary', action='store_true', help='Write binary PLY.')
+    parser.add_argument('--check', type=str, default='mtime', choices=['mtime', 'hash', 'none'], help='How to detect outputs that are up to date; outputs written with different options are always converted again.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of processes.')
+
+    args = parser.parse_args()
+    assert args.workers > 0
+
+    formats = [args.from_format] if args.from_format else INPUT_FORMATS
+    inputs = find_inputs(args.inputs, ['.' + input_format for input_format in formats])
+    if len(inputs) == 0:
+        print('No input files found.')
+        exit(1)
+
+    if not os.path.exists(args.output):
+        os.makedirs(args.output)
+
+    hash_file = os.path.join(args.output, HASH_FILE)
+    hashes = {}
+    if os.path.exists(hash_file):
+        with open(hash_file, 'r') as fp:
+            hashes = json.load(fp)
+
+    # The extension of the input is kept, e.g. chair.off becomes chair.off.ply, such that
+    # inputs with the same name but different formats do not map to the same output.
+    root = os.path.dirname(inputs[0]) if len(inputs) == 1 else os.path.commonpath([os.path.abspath(input_file) for input_file in inputs])
+    jobs = []
+    for input_file in inputs:
+        relative = os.path.relpath(os.path.abspath(input_file), os.path.abspath(root))
+        output_file = os.path.join(args.output, relative + '.' + args.format)
+
+        # Both checks only skip outputs that were written to the same file with the same options.
+        previous = hashes.get(os.path.abspath(input_file))
+        if not isinstance(previous, dict) or previous.get('output') != os.path.abspath(output_file) \
+                or previous.get('binary') != args.binary:
+            previous = None
+
+        jobs.append((input_file, output_file, args.binary, args.check, previous))
+
+    jobs_by_input = dict((job[0], job[1]) for job in jobs)
+
+    start = time.time()
+    num_converted = 0
+    num_skipped = 0
+    failed = []
+
+    pool = multiprocessing.Pool(args.workers)
+    for input_file, status, input_hash in pool.imap_unordered(convert_job, jobs, chunksize=8):
+        if status == 'converted':
+            num_converted += 1
+        elif status == 'skipped':
+            num_skipped += 1
+        else:
+            failed.append((input_file, status))
+            continue
+
+        if status == 'converted' or input_hash is not None:
+            hashes[os.path.abspath(input_file)] = {
+                'hash': input_hash,
+                'output': os.path.abspath(jobs_by_input[input_file]),
+                'binary': args.binary,
+            }
+
+    pool.close()
+    pool.join()
+
+    with open(hash_file, 'w') as fp:
+        json.dump(hashes, fp)
+
+    elapsed = time.time() - start
+    print('Converted %d and skipped %d of %d files in %.2fs (%.2f files/s).'
+          % (num_converted, num_skipped, len(jobs), elapsed, (num_converted + num_skipped) / max(elapsed, 1e-6)))
+
+    if len(failed) > 0:
+        for input_file, status in failed:
+            print('Failed: %s (%s)' % (input_file, status))
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+#!/bin/bash
+if [ -z "$BLENDER" ]; then
+    export BLENDER="blender"
+fi
+
+"$BLENDER" --background --python render_batch.py -- --manifest examples/batch.jsonl
@@ -0,0 +1,358 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+
+def instance_geometry(base_vertices, base_faces, locations, radius):
+    """
+    Instantiate a base mesh at all given locations at once, e.g. to build
+    the spheres of a point cloud or the cubes of an occupancy grid.
+
+    The base vertices are scaled by the radius and offset by every location;
+    the face indices of the i-th instance are shifted by i times the number of base
+    vertices such that all instances end up in a single vertex and face array.
+
+    :param base_vertices: vertices of the base mesh as V x 3 array
+    :type base_vertices: numpy.ndarray
+    :param base_faces: faces of the base mesh as F x K array of vertex indices
+    :type base_faces: numpy.ndarray
+    :param locations: locations of the instances as N x 3 array
+    :type locations: numpy.ndarray
+    :param radius: scale of the base mesh
+    :type radius: float
+    :return: vertices as (N*V) x 3 array and faces as (N*F) x K array
+    :rtype: numpy.ndarray, numpy.ndarray
+    """
+
+    base_vertices = np.asarray(base_vertices, dtype=float)
+    base_faces = np.asarray(base_faces, dtype=int)
+    locations = np.asarray(locations, dtype=float).reshape(-1, 3)
+
+    assert base_vertices.ndim == 2 and base_vertices.shape[1] == 3
+    assert base_faces.ndim == 2
+
+    num_instances = locations.shape[0]
+    num_base_vertices = base_vertices.shape[0]
+
+    vertices = base_vertices[np.newaxis, :, :] * radius + locations[:, np.newaxis, :]
+    faces = base_faces[np.newaxis, :, :] + (np.arange(num_instances) * num_base_vertices)[:, np.newaxis, np.newaxis]
+
+    return vertices.reshape(-1, 3), faces.reshape(-1, base_faces.shape[1])
+
+
+def voxel_centers(size, scale=1, offset=0):
+    """
+    Compute the voxel centers along one axis of an occupancy grid; the grid is
+    assumed to cover [-0.5, 0.5] before scaling and offsetting, as in load_binvox.
+
+    :param size: number of voxels along the axis
+    :type size: int
+    :param scale: scale of the axis
+    :type scale: float
+    :param offset: offset of the axis after scaling
+    :type offset: float
+    :return: voxel centers
+    :rtype: numpy.ndarray
+    """
+
+    return ((np.arange(size) + 0.5) / size - 0.5) * scale + offset
+
+
+def occupancy_boundary(occupancy):
+    """
+    Determine the visible faces of an occupancy grid, i.e. the faces of occupied voxels
+    whose neighbouring voxel is empty (or outside of the grid).
+
+    The result is a list of six boolean grids, one for each face direction,
+    in the order -x, +x, -y, +y, -z, +z.
+
+    :param occupancy: occupancy grid as 3D boolean array
+    :type occupancy: numpy.ndarray
+    :return: visible faces per direction
+    :rtype: [numpy.ndarray]
+    """
+
+    occupancy = np.asarray(occupancy, dtype=bool)
+    assert occupancy.ndim == 3
+
+    padded = np.pad(occupancy, 1, mode='constant', constant_values=False)
+    inner = (slice(1, -1),)*3
+
+    visible = []
+    for axis in range(3):
+        for sign in [-1, 1]:
+            neighbour = list(inner)
+            neighbour[axis] = slice(1 + sign, padded.shape[axis] - 1 + sign)
+            visible.append(np.logical_and(occupancy, np.logical_not(padded[tuple(neighbour)])))
+
+    return visible
+
+
+def _quad_geometry(axis, sign, lower, upper, centers, radius):
+    """
+    Compute the quads for the given axis-aligned faces; each face covers the voxels
+    lower to upper (inclusive) and is oriented such that its normal points in
+    direction sign along axis.
+
+    :param axis: axis of face normal
+    :type axis: int
+    :param sign: direction of face normal, -1 or 1
+    :type sign: int
+    :param lower: lower voxel indices as N x 3 array
+    :type lower: numpy.ndarray
+    :param upper: upper voxel indices as N x 3 array
+    :type upper: numpy.ndarray
+    :param centers: voxel centers per axis
+    :type centers: [numpy.ndarray]
+    :param radius: half side length of the voxel cubes, per axis
+    :type radius: numpy.ndarray
+    :return: vertices as (N*4) x 3 array
+    :rtype: numpy.ndarray
+    """
+
+    u = (axis + 1) % 3
+    v = (axis + 2) % 3
+
+    minimum = np.zeros(lower.shape, dtype=float)
+    maximum = np.zeros(upper.shape, dtype=float)
+    for c in range(3):
+        minimum[:, c] = centers[c][lower[:, c]] - radius[c]
+        maximum[:, c] = centers[c][upper[:, c]] + radius[c]
+
+    # The corners are ordered counter-clockwise when looking at the face from outside.
+    if sign > 0:
+        corners = [(0, 0), (1, 0), (1, 1), (0, 1)]
+    else:
+        corners = [(0, 0), (0, 1), (1, 1), (1, 0)]
+
+    vertices = np.zeros((lower.shape[0], 4, 3), dtype=float)
+    vertices[:, :, axis] = (maximum[:, axis] if sign > 0 else minimum[:, axis])[:, np.newaxis]
+    for i, (corner_u, corner_v) in enumerate(corners):
+        vertices[:, i, u] = maximum[:, u] if corner_u else minimum[:, u]
+        vertices[:, i, v] = maximum[:, v] if corner_v else minimum[:, v]
+
+    return vertices.reshape(-1, 3)
+
+
+def merge_faces(visible, axis):
+    """
+    Greedily merge the visible faces of one direction into rectangles. First, adjacent faces
+    are merged into runs along the second in-plane axis; then, runs covering the same
+    range are merged across consecutive rows of the first in-plane axis.
+
+    :param visible: visible faces as 3D boolean array, see occupancy_boundary
+    :type visible: numpy.ndarray
+    :param axis: axis of the face normal
+    :type axis: int
+    :return: lower and upper voxel indices (inclusive) of the rectangles as N x 3 arrays
+    :rtype: numpy.ndarray, numpy.ndarray
+    """
+
+    u = (axis + 1) % 3
+    v = (axis + 2) % 3
+
+    # Slices along the normal come first, runs are found along the last axis.
+    mask = np.transpose(np.asarray(visible, dtype=bool), (axis, u, v))
+    padded = np.pad(mask, ((0, 0), (0, 0), (1, 1)), mode='constant', constant_values=False)
+    changes = np.diff(padded.astype(np.int8), axis=2)
+
+    slices, rows, starts = np.nonzero(changes == 1)
+    ends = np.nonzero(changes == -1)[2]
+    if slices.shape[0] == 0:
+        return np.zeros((0, 3), dtype=int), np.zeros((0, 3), dtype=int)
+
+    # Sort runs by slice, start and end, then by row; consecutive rows with the
+    # same run are merged.
+    order = np.lexsort((rows, ends, starts, slices))
+    slices, rows, starts, ends = slices[order], rows[order], starts[order], ends[order]
+
+    new = np.ones(slices.shape[0], dtype=bool)
+    new[1:] = np.logical_or.reduce((
+        slices[1:] != slices[:-1],
+        starts[1:] != starts[:-1],
+        ends[1:] != ends[:-1],
+        rows[1:] != rows[:-1] + 1,
+    ))
+    first = np.flatnonzero(new)
+    last = np.append(first[1:], slices.shape[0]) - 1
+
+    lower = np.zeros((first.shape[0], 3), dtype=int)
+    upper = np.zeros((first.shape[0], 3), dtype=int)
+    lower[:, axis] = slices[first]
+    upper[:, axis] = slices[first]
+    lower[:, u] = rows[first]
+    upper[:, u] = rows[last]
+    lower[:, v] = starts[first]
+    upper[:, v] = ends[first] - 1
+
+    return lower, upper
+
+
+def occupancy_geometry(occupancy, radius, offset=(0, 0, 0), scale=(1, 1, 1), greedy=False):
+    """
+    Build the faces of an occupancy grid rendered as cubes, skipping all faces
+    between two occupied voxels. If greedy is true, coplanar adjacent faces are
+    additionally merged into larger quads, see merge_faces.
+
+    Note that the culled faces are only hidden if the cubes touch, i.e. if the radius
+    is (at least) half the voxel size after scaling; the same holds for merged faces.
+
+    :param occupancy: occupancy grid as 3D boolean array, axes correspond to x, y, z
+    :type occupancy: numpy.ndarray
+    :param radius: half side length of the cubes, either the same for all axes or per axis
+    :type radius: float or (float, float, float)
+    :param offset: offset after scaling
+    :type offset: (float, float, float)
+    :param scale: scale per axis
+    :type scale: (float, float, float)
+    :param greedy: whether to merge coplanar faces
+    :type greedy: bool
+    :return: vertices as V x 3 array and quad faces as F x 4 array
+    :rtype: numpy.ndarray, numpy.ndarray
+    """
+
+    assert len(offset) == 3
+    assert len(scale) == 3
+
+    occupancy = np.asarray(occupancy, dtype=bool)
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), (3,))
+    centers = [voxel_centers(occupancy.shape[c], scale[c], offset[c]) for c in range(3)]
+    visible = occupancy_boundary(occupancy)
+
+    vertices = []
+    for d in range(6):
+        axis, sign = d // 2, 2*(d % 2) - 1
+        if greedy:
+            lower, upper = merge_faces(visible[d], axis)
+        else:
+            lower = upper = np.argwhere(visible[d])
+        vertices.append(_quad_geometry(axis, sign, lower, upper, centers, radius))
+
+    vertices = np.concatenate(vertices, axis=0)
+    faces = np.arange(vertices.shape[0]).reshape(-1, 4)
+
+    return vertices, faces
+
+
+class GeometryCache:
+    """
+    On-disk cache for generated geometry, i.e. vertex and face arrays, stored as NPZ files.
+    Entries are keyed by the content of the input file and the parameters used to generate
+    the geometry; if the cache exceeds its maximum size, the least recently used entries are removed.
+    """
+
+    def __init__(self, directory, max_size=2*1024**3):
+        """
+        Constructor.
+
+        :param directory: cache directory, created if it does not exist
+        :type directory: str
+        :param max_size: maximum size of the cache in bytes
+        :type max_size: int
+        """
+
+        self.directory = directory
+        """ (str) Cache directory. """
+
+        self.max_size = max_size
+        """ (int) Maximum size in bytes. """
+
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+    def key(self, filepath, header_size=None, **parameters):
+        """
+        Compute the key for the given input file and parameters.
+
+        By default, the whole content of the file is hashed. For large files of which only parts
+        are read, e.g. memory-mapped point clouds, header_size can be given; then only the size,
+        the modification time and the first header_size bytes of the file are hashed.
+
+        :param filepath: path to input file
+        :type filepath: str
+        :param header_size: number of bytes to hash together with size and modification time, or None to hash the content
+        :type header_size: int
+        :param parameters: parameters used to generate the geometry, need to be JSON serializable
+        :return: key
+        :rtype: str
+        """
+
+        sha1 = hashlib.sha1()
+        with open(filepath, 'rb') as f:
+            if header_size is None:
+                for chunk in iter(lambda: f.read(1024*1024), b''):
+                    sha1.update(chunk)
+            else:
+                stat = os.fstat(f.fileno())
+                sha1.update(('%d %r' % (stat.st_size, stat.st_mtime)).encode('utf-8'))
+                sha1.update(f.read(header_size))
+
+        sha1.update(json.dumps(parameters, sort_keys=True).encode('utf-8'))
+        return sha1.hexdigest()
+
+    def load(self, key):
+        """
+        Load vertices and faces for the given key.
+
+        :param key: key as returned by key()
+        :type key: str
+        :return: vertices and faces, or None if not cached
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        """
+
+        filepath = os.path.join(self.directory, key + '.npz')
+        if not os.path.exists(filepath):
+            return None
+
+        # The modification time is used to determine the least recently used entries.
+        os.utime(filepath, None)
+        with np.load(filepath) as data:
+            return data['vertices'], data['faces']
+
+    def save(self, key, vertices, faces):
+        """
+        Save vertices and faces for the given key and remove the least recently used
+        entries if the cache exceeds its maximum size.
+
+        :param key: key as returned by key()
+        :type key: str
+        :param vertices: vertices as V x 3 array
+        :type vertices: numpy.ndarray
+        :param faces: faces as F x K array
+        :type faces: numpy.ndarray
+        """
+
+        filepath = os.path.join(self.directory, key + '.npz')
+
+        # Written to a temporary file first such that concurrent processes never see partial entries.
+        temporary = os.path.join(self.directory, key + '.%d.tmp.npz' % os.getpid())
+        np.savez(temporary, vertices=np.asarray(vertices, dtype=np.float32), faces=np.asarray(faces, dtype=np.int32))
+        os.replace(temporary, filepath)
+
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache does not exceed its maximum size.
+        """
+
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz') and not name.endswith('.tmp.npz'):
+                filepath = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.path.getmtime(filepath), os.path.getsize(filepath), filepath))
+                except OSError:
+                    continue
+
+        size = sum(entry[1] for entry in entries)
+        for mtime, entry_size, filepath in sorted(entries):
+            if size <= self.max_size:
+                break
+
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+            size -= entry_size
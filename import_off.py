@@ -22,6 +22,7 @@
 import os
 import bpy
 import mathutils
+import numpy as np
 from bpy.props import (BoolProperty,
     FloatProperty,
     StringProperty,
@@ -148,6 +149,11 @@ class ExportOFF(bpy.types.Operator, ExportHelper):
             description="Export the active vertex color layer",
             default=False,
             )
+    use_binary = BoolProperty(
+            name="Binary",
+            description="Export in binary OFF format",
+            default=False,
+            )
 
     def execute(self, context):
         keywords = self.as_keywords(ignore=('axis_forward',
@@ -177,78 +183,159 @@ def unregister():
     bpy.types.INFO_MT_file_import.remove(menu_func_import)
     bpy.types.INFO_MT_file_export.remove(menu_func_export)
 
+def read_binary_faces(data, fcount, filepath):
+    # Faces of binary OFF are followed by their number of color components and the
+    # colors themselves; only the vertex counts and indices are kept
+    fsize = data[0] if data.shape[0] > 0 else 0
+    if fcount > 0 and data.shape[0] >= fcount*(fsize + 2):
+        faces = data[:fcount*(fsize + 2)].reshape(fcount, fsize + 2)
+        if np.all(faces[:, 0] == fsize) and np.all(faces[:, -1] == 0):
+            return faces[:, :-1].ravel()
+
+    keep = np.zeros(data.shape[0], dtype=bool)
+    position = 0
+    for i in range(fcount):
+        assert position < data.shape[0], 'expected %d faces in %s' % (fcount, filepath)
+        total = data[position]
+        assert total >= 0 and position + total + 1 < data.shape[0], 'invalid face in %s' % filepath
+        keep[position:position + total + 1] = True
+        position += total + 2 + data[position + total + 1]
+
+    return data[keep]
+
+def read_off_arrays(filepath):
+    # Parse OFF (or COFF) into NumPy arrays; all numbers after the header are
+    # converted at once instead of line by line. Binary OFF (as written by
+    # write_binary_off) is read without any parsing.
+    with open(filepath, 'rb') as file:
+        line = file.readline()
+        while line and line.isspace():
+            line = file.readline()
+        assert line, 'invalid OFF header in %s' % filepath
+        header = line.decode('ascii').strip()
+
+        # The magic is matched case-insensitively, as in mesh.read_off
+        use_colors = header.upper().startswith('COFF')
+        magic = 'COFF' if use_colors else 'OFF'
+        assert header.upper().startswith(magic), 'invalid OFF file %s' % filepath
+
+        # ModelNet puts 'OFF' and the counts in the same line, without a space in between
+        counts = header[len(magic):].split()
+        binary = len(counts) > 0 and counts[0].upper() == 'BINARY'
+        if binary:
+            data = file.read()
+        else:
+            while len(counts) == 0:
+                line = file.readline()
+                assert line, 'invalid OFF header in %s' % filepath
+                counts = line.split()
+            assert len(counts) >= 2, 'invalid OFF header in %s' % filepath
+            vcount, fcount = int(counts[0]), int(counts[1])
+
+            # The number of values per vertex (3, or 6/7 for COFF) is taken from the first vertex
+            line = file.readline()
+            while line.isspace():
+                line = file.readline()
+            vsize = len(line.split())
+            values = np.fromstring((line + file.read()).decode('ascii'), dtype=float, sep=' ')
+
+    if binary:
+        # Big endian 32 bit integers and floats, COFF vertices have RGBA colors in [0, 1]
+        assert len(data) >= 12, 'invalid OFF header in %s' % filepath
+        vcount, fcount = [int(count) for count in np.frombuffer(data, dtype='>i4', count=3)[:2]]
+        vsize = 7 if use_colors else 3
+        assert len(data) >= 12 + 4*vcount*vsize, 'expected %d vertices in %s' % (vcount, filepath)
+
+        vertex_data = np.frombuffer(data, dtype='>f4', count=vcount*vsize, offset=12).astype(float).reshape(vcount, vsize)
+        verts = vertex_data[:, :3]
+        colors = vertex_data[:, 3:6] if use_colors else None
+
+        face_bytes = (len(data) - 12 - 4*vcount*vsize) // 4 * 4
+        face_data = np.frombuffer(data[12 + 4*vcount*vsize:12 + 4*vcount*vsize + face_bytes], dtype='>i4').astype(np.int64)
+        face_data = read_binary_faces(face_data, fcount, filepath)
+    else:
+        if vcount == 0:
+            vsize = 3
+        assert vsize >= 3 and (not use_colors or vsize >= 6), 'invalid vertex in %s' % filepath
+        assert values.shape[0] >= vcount*vsize, 'expected %d vertices in %s' % (vcount, filepath)
+
+        vertex_data = values[:vcount*vsize].reshape(vcount, vsize)
+        verts = vertex_data[:, :3]
+        colors = vertex_data[:, 3:6] / 255 if use_colors else None
+
+        face_data = values[vcount*vsize:].astype(np.int64)
+
+    assert face_data.shape[0] >= fcount, 'expected %d faces in %s' % (fcount, filepath)
+    fsize = face_data[0] if face_data.shape[0] > 0 else 0
+    if fcount > 0 and face_data.shape[0] == fcount*(fsize + 1) \
+            and np.all(face_data[::fsize + 1] == fsize):
+        # All faces have the same number of vertices, the common case
+        totals = np.full(fcount, fsize, dtype=np.int64)
+        starts = np.arange(fcount, dtype=np.int64)*(fsize + 1)
+    else:
+        # Only the position of every face is determined sequentially
+        totals = np.zeros(fcount, dtype=np.int64)
+        starts = np.zeros(fcount, dtype=np.int64)
+        position = 0
+        for i in range(fcount):
+            assert position < face_data.shape[0], 'expected %d faces in %s' % (fcount, filepath)
+            starts[i] = position
+            totals[i] = face_data[position]
+            assert totals[i] >= 0, 'invalid face in %s' % filepath
+            position += totals[i] + 1
+        assert position <= face_data.shape[0], 'expected %d faces in %s' % (fcount, filepath)
+
+    # Gather the vertex indices of all faces; faces with two vertices are edges
+    offsets = np.repeat(starts + 1 - np.cumsum(totals) + totals, totals)
+    indices = face_data[np.arange(totals.sum()) + offsets]
+    assert np.all(indices >= 0) and np.all(indices < vcount), 'invalid vertex index in %s' % filepath
+
+    is_facet = np.repeat(totals >= 3, totals)
+    loops = indices[is_facet]
+    loop_totals = totals[totals >= 3]
+    edges = indices[np.repeat(totals == 2, totals)].reshape(-1, 2)
+
+    return verts, loops, loop_totals, edges, colors
+
 def load(operator, context, filepath):
     # Parse mesh from OFF file
-    # TODO: Add support for NOFF and COFF
+    # TODO: Add support for NOFF
     filepath = os.fsencode(filepath)
-    file = open(filepath, 'r')
-    first_line = file.readline().rstrip()
-    use_colors = (first_line == 'COFF')
-    colors = []
-    vcount, fcount, ecount = [int(x) for x in file.readline().split()]
-    verts = []
-    facets = []
-    edges = []
-    i=0;
-    while i<vcount:
-        line = file.readline()
-        if line.isspace():
-            continue    # skip empty lines
-        try:
-             bits = [float(x) for x in line.split()]
-             px = bits[0]
-             py = bits[1]
-             pz = bits[2]
-             if use_colors:
-                 colors.append([float(bits[3]) / 255, float(bits[4]) / 255, float(bits[5]) / 255])
-
-        except ValueError:
-            i=i+1
-            continue
-        verts.append((px, py, pz))
-        i=i+1
-
-    i=0;
-    while i<fcount:
-        line = file.readline()
-        if line.isspace():
-            continue    # skip empty lines
-        try:
-            splitted  = line.split()
-            ids   = list(map(int, splitted))
-            if len(ids) > 3:
-                facets.append(tuple(ids[1:]))
-            elif len(ids) == 3:
-                edges.append(tuple(ids[1:]))
-        except ValueError:
-            i=i+1
-            continue
-        i=i+1
-
-    # Assemble mesh
+    verts, loops, loop_totals, edges, colors = read_off_arrays(filepath)
+
+    # Assemble mesh; all data is set in bulk using foreach_set
     off_name = bpy.path.display_name_from_filepath(filepath)
     mesh = bpy.data.meshes.new(name=off_name)
-    mesh.from_pydata(verts,edges,facets)
-    # mesh.vertices.add(len(verts))
-    # mesh.vertices.foreach_set("co", unpack_list(verts))
+    mesh.vertices.add(verts.shape[0])
+    mesh.vertices.foreach_set("co", verts.astype(np.float32).ravel())
+
+    mesh.edges.add(edges.shape[0])
+    mesh.edges.foreach_set("vertices", edges.astype(np.int32).ravel())
 
-    # mesh.faces.add(len(facets))
-    # mesh.faces.foreach_set("vertices", unpack_face_list(facets))
+    mesh.loops.add(loops.shape[0])
+    mesh.loops.foreach_set("vertex_index", loops.astype(np.int32))
 
+    loop_starts = np.cumsum(loop_totals) - loop_totals
+    mesh.polygons.add(loop_totals.shape[0])
+    mesh.polygons.foreach_set("loop_start", loop_starts.astype(np.int32))
+    mesh.polygons.foreach_set("loop_total", loop_totals.astype(np.int32))
+
+    mesh.update(calc_edges=True)
     mesh.validate()
-    mesh.update()
 
-    if use_colors:
+    if colors is not None:
+        # Vertex colors are stored per loop
         color_data = mesh.vertex_colors.new()
-        for i, facet in enumerate(mesh.polygons):
-            for j, vidx in enumerate(facet.vertices):
-                color_data.data[3*i + j].color = colors[vidx]
+        loop_indices = np.zeros(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loop_indices)
+        color_data.data.foreach_set("color", colors[loop_indices].astype(np.float32).ravel())
 
     return mesh
 
 def save(operator, context, filepath,
     global_matrix = None,
-    use_colors = False):
+    use_colors = False,
+    use_binary = False):
     # Export the selected mesh
     APPLY_MODIFIERS = True # TODO: Make this configurable
     if global_matrix is None:
@@ -261,29 +348,36 @@ def save(operator, context, filepath,
     obj_mat = obj.matrix_world
     mesh.transform(global_matrix * obj_mat)
 
-    verts = mesh.vertices[:]
-    facets = [ f for f in mesh.tessfaces ]
-    # Collect colors by vertex id
-    colors = False
-    vertex_colors = None
-    if use_colors:
-        colors = mesh.tessface_vertex_colors.active
-    if colors:
-        colors = colors.data
-        vertex_colors = {}
-        for i, facet in enumerate(mesh.tessfaces):
-            color = colors[i]
-            color = color.color1[:], color.color2[:], color.color3[:], color.color4[:]
-            for j, vidx in enumerate(facet.vertices):
-                if vidx not in vertex_colors:
-                    vertex_colors[vidx] = (int(color[j][0] * 255.0),
-                                            int(color[j][1] * 255.0),
-                                            int(color[j][2] * 255.0))
-    else:
-        use_colors = False
+    # Collect all data in bulk using foreach_get
+    verts = np.zeros(len(mesh.vertices)*3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", verts)
+    verts = verts.reshape(-1, 3)
+
+    loops = np.zeros(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loops)
+    loop_totals = np.zeros(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+
+    # Collect colors by vertex id, the first loop of every vertex is used
+    colors = None
+    if use_colors and mesh.vertex_colors.active:
+        loop_colors = np.zeros(len(mesh.loops)*3, dtype=np.float32)
+        mesh.vertex_colors.active.data.foreach_get("color", loop_colors)
+        unique_verts, first_loops = np.unique(loops, return_index=True)
+        colors = np.zeros((verts.shape[0], 3), dtype=np.float32)
+        colors[unique_verts] = loop_colors.reshape(-1, 3)[first_loops]
+    use_colors = colors is not None
+
+    # Every face is written as its number of vertices followed by the vertex indices
+    face_data = np.insert(loops, np.cumsum(loop_totals) - loop_totals, loop_totals)
 
     # Write geometry to file
     filepath = os.fsencode(filepath)
+    if use_binary:
+        write_binary_off(filepath, verts, face_data, loop_totals, colors)
+        bpy.data.meshes.remove(mesh)
+        return {'FINISHED'}
+
     fp = open(filepath, 'w')
 
     if use_colors:
@@ -291,21 +385,39 @@ def save(operator, context, filepath,
     else:
         fp.write('OFF\n')
 
-    fp.write('%d %d 0\n' % (len(verts), len(facets)))
+    fp.write('%d %d 0\n' % (verts.shape[0], loop_totals.shape[0]))
 
-    for i, vert in enumerate(mesh.vertices):
-        fp.write('%.16f %.16f %.16f' % vert.co[:])
-        if use_colors:
-            fp.write(' %d %d %d 255' % vertex_colors[i])
-        fp.write('\n')
+    # All vertices and faces are formatted at once
+    if use_colors:
+        vertex_data = np.concatenate((verts, np.floor(colors * 255.0), np.full((verts.shape[0], 1), 255)), axis=1)
+        fp.write(('%.16f %.16f %.16f %d %d %d %d\n' * verts.shape[0]) % tuple(vertex_data.ravel().tolist()))
+    else:
+        fp.write(('%.16f %.16f %.16f\n' * verts.shape[0]) % tuple(verts.ravel().tolist()))
 
-    #for facet in facets:
-    for i, facet in enumerate(mesh.tessfaces):
-        fp.write('%d' % len(facet.vertices))
-        for vid in facet.vertices:
-            fp.write(' %d' % vid)
-        fp.write('\n')
+    face_format = np.full(face_data.shape[0], '%d ', dtype=object)
+    face_format[np.cumsum(loop_totals + 1) - 1] = '%d\n'
+    fp.write(''.join(face_format) % tuple(face_data.tolist()))
 
     fp.close()
+    bpy.data.meshes.remove(mesh)
 
     return {'FINISHED'}
+
+def write_binary_off(filepath, verts, face_data, loop_totals, colors=None):
+    # Binary OFF as in Geomview: big endian 32 bit integers and floats,
+    # every face is followed by its number of color components (0)
+    fp = open(filepath, 'wb')
+
+    if colors is not None:
+        fp.write(b'COFF BINARY\n')
+        vertex_data = np.concatenate((verts, colors, np.ones((verts.shape[0], 1))), axis=1)
+    else:
+        fp.write(b'OFF BINARY\n')
+        vertex_data = verts
+
+    fp.write(np.array([verts.shape[0], loop_totals.shape[0], 0], dtype='>i4').tobytes())
+    fp.write(vertex_data.astype('>f4').tobytes())
+
+    fp.write(np.insert(face_data, np.cumsum(loop_totals + 1), 0).astype('>i4').tobytes())
+
+    fp.close()
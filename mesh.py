@@ -1,159 +1,186 @@
 import os
+import re
 import numpy as np
+import ply
 
 
-def write_off(file, vertices, faces):
+def _format_rows(array, fmt):
+    """
+    Format all rows of a 2D array at once, using a single string formatting operation
+    instead of formatting the rows individually.
+
+    :param array: array to format
+    :type array: numpy.ndarray
+    :param fmt: format of a single row, e.g. '%d %d %d'
+    :type fmt: str
+    :return: formatted rows, each terminated by a newline
+    :rtype: str
     """
-    Writes the given vertices and faces to OFF.
 
-    :param vertices: vertices as tuples of (x, y, z) coordinates
-    :type vertices: [(float)]
-    :param faces: faces as tuples of (num_vertices, vertex_id_1, vertex_id_2, ...)
-    :type faces: [(int)]
+    return ((fmt + '\n') * array.shape[0]) % tuple(array.ravel().tolist())
+
+def _check_arrays(file, vertices, faces, face_size):
     """
+    Convert vertices and faces to arrays and validate them using vectorized checks.
 
-    num_vertices = len(vertices)
-    num_faces = len(faces)
+    :param file: path to file, used in error messages
+    :type file: str
+    :param vertices: vertices as N x 3 array or list
+    :type vertices: numpy.ndarray or [(float)]
+    :param faces: faces as M x face_size array or list
+    :type faces: numpy.ndarray or [(int)]
+    :param face_size: expected number of values per face
+    :type face_size: int
+    :return: vertices and faces
+    :rtype: numpy.ndarray, numpy.ndarray
+    """
 
-    assert num_vertices > 0
-    assert num_faces > 0
+    vertices = np.asarray(vertices, dtype=float)
+    faces = np.asarray(faces, dtype=int)
 
-    with open(file, 'w') as fp:
-        fp.write('OFF\n')
-        fp.write(str(num_vertices) + ' ' + str(num_faces) + ' 0\n')
+    assert vertices.ndim == 2 and vertices.shape[0] > 0
+    assert faces.ndim == 2 and faces.shape[0] > 0
 
-        for vertex in vertices:
-            assert len(vertex) == 3, 'invalid vertex with %d dimensions found (%s)' % (len(vertex), file)
-            fp.write(str(vertex[0]) + ' ' + str(vertex[1]) + ' ' + str(vertex[2]) + '\n')
+    assert vertices.shape[1] == 3, 'invalid vertices with %d dimensions found (%s)' % (vertices.shape[1], file)
+    assert faces.shape[1] == face_size, 'faces need to have %d values, but found %d (%s)' % (face_size, faces.shape[1], file)
 
-        for face in faces:
-            assert face[0] == 3, 'only triangular faces supported (%s)' % file
-            assert len(face) == 4, 'faces need to have 3 vertices, but found %d (%s)' % (len(face), file)
+    indices = faces[:, face_size - 3:]
+    invalid = np.logical_or(indices < 0, indices >= vertices.shape[0])
+    assert not np.any(invalid), 'invalid vertex index %d (of %d vertices) (%s)' % (indices[invalid][0], vertices.shape[0], file)
 
-            for i in range(len(face)):
-                assert face[i] >= 0 and face[i] < num_vertices, 'invalid vertex index %d (of %d vertices) (%s)' % (face[i], num_vertices, file)
+    return vertices, faces
 
-                fp.write(str(face[i]))
-                if i < len(face) - 1:
-                    fp.write(' ')
+def write_off(file, vertices, faces):
+    """
+    Writes the given vertices and faces to OFF.
+
+    :param vertices: vertices as tuples of (x, y, z) coordinates or N x 3 array
+    :type vertices: [(float)] or numpy.ndarray
+    :param faces: faces as tuples of (num_vertices, vertex_id_1, vertex_id_2, ...) or M x 4 array
+    :type faces: [(int)] or numpy.ndarray
+    """
 
-            fp.write('\n')
+    vertices, faces = _check_arrays(file, vertices, faces, 4)
+    assert np.all(faces[:, 0] == 3), 'only triangular faces supported (%s)' % file
+
+    with open(file, 'w') as fp:
+        fp.write('OFF\n')
+        fp.write('%d %d 0\n' % (vertices.shape[0], faces.shape[0]))
+        fp.write(_format_rows(vertices, '%r %r %r'))
+        fp.write(_format_rows(faces, '%d %d %d %d'))
 
         # add empty line to be sure
         fp.write('\n')
 
-def read_off(file):
+def _read_binary_off(file, data):
     """
-    Reads vertices and faces from an off file.
+    Reads vertices and triangular faces from the body of a binary OFF file, i.e. big endian
+    32 bit counts, vertices and faces; every face is followed by its number of colors, which needs to be zero.
 
-    :param file: path to file to read
+    :param file: path to file, used in error messages
     :type file: str
-    :return: vertices and faces as lists of tuples
-    :rtype: [(float)], [(int)]
+    :param data: content of the file after the header line
+    :type data: bytes
+    :return: vertices as N x 3 array and faces as M x 4 array of (3, vertex_id_1, vertex_id_2, vertex_id_3)
+    :rtype: numpy.ndarray, numpy.ndarray
     """
 
-    assert os.path.exists(file), 'file %s not found' % file
+    assert len(data) >= 12, 'invalid OFF file %s' % file
+    num_vertices, num_faces = [int(count) for count in np.frombuffer(data, dtype='>i4', count=3)[:2]]
+    assert num_vertices > 0
+    assert num_faces > 0
+    assert len(data) == 12 + 4*3*num_vertices + 4*5*num_faces, \
+        'expected %d vertices and %d triangular faces without colors (%s)' % (num_vertices, num_faces, file)
 
-    with open(file, 'r') as fp:
-        lines = fp.readlines()
-        lines = [line.strip() for line in lines]
+    vertices = np.frombuffer(data, dtype='>f4', count=3*num_vertices, offset=12).astype(float).reshape(num_vertices, 3)
+    faces = np.frombuffer(data, dtype='>i4', offset=12 + 4*3*num_vertices).astype(int).reshape(num_faces, 5)
 
-        # Fix for ModelNet bug were 'OFF' and the number of vertices and faces are
-        # all in the first line.
-        if len(lines[0]) > 3:
-            assert lines[0][:3] == 'OFF' or lines[0][:3] == 'off', 'invalid OFF file %s' % file
+    assert np.all(faces[:, 0] == 3), 'only triangular meshes supported (%s)' % file
+    assert np.all(faces[:, 4] == 0), 'face colors not supported (%s)' % file
+    faces = faces[:, :4]
 
-            parts = lines[0][3:].split(' ')
-            assert len(parts) == 3
+    invalid = np.logical_or(faces[:, 1:] < 0, faces[:, 1:] >= num_vertices)
+    assert not np.any(invalid), 'vertex %d (of %d vertices) does not exist (%s)' % (faces[:, 1:][invalid][0], num_vertices, file)
 
-            num_vertices = int(parts[0])
-            assert num_vertices > 0
+    return vertices, faces
 
-            num_faces = int(parts[1])
-            assert num_faces > 0
+def read_off(file):
+    """
+    Reads vertices and faces from an off file.
 
-            start_index = 1
-        # This is the regular case!
-        else:
-            assert lines[0] == 'OFF' or lines[0] == 'off', 'invalid OFF file %s' % file
+    The vertex and face blocks are parsed in bulk using NumPy, and all face
+    indices are validated at once. Binary OFF files (OFF BINARY, e.g. as exported by import_off.py)
+    are read directly as big endian arrays.
 
-            parts = lines[1].split(' ')
-            assert len(parts) == 3
+    :param file: path to file to read
+    :type file: str
+    :return: vertices as N x 3 array and faces as M x 4 array of (3, vertex_id_1, vertex_id_2, vertex_id_3)
+    :rtype: numpy.ndarray, numpy.ndarray
+    """
 
-            num_vertices = int(parts[0])
-            assert num_vertices > 0
+    assert os.path.exists(file), 'file %s not found' % file
 
-            num_faces = int(parts[1])
-            assert num_faces > 0
+    with open(file, 'rb') as fp:
+        header = fp.readline().decode('ascii').strip()
 
-            start_index = 2
+        if header.split() == ['OFF', 'BINARY']:
+            return _read_binary_off(file, fp.read())
 
-        vertices = []
-        for i in range(num_vertices):
-            vertex = lines[start_index + i].split(' ')
-            vertex = [float(point.strip()) for point in vertex if point != '']
-            assert len(vertex) == 3
+        # Fix for ModelNet bug were 'OFF' and the number of vertices and faces are
+        # all in the first line.
+        if len(header) > 3:
+            assert header[:3] == 'OFF' or header[:3] == 'off', 'invalid OFF file %s' % file
+            parts = header[3:].split()
+        # This is the regular case!
+        else:
+            assert header == 'OFF' or header == 'off', 'invalid OFF file %s' % file
+            parts = fp.readline().decode('ascii').split()
 
-            vertices.append(vertex)
+        assert len(parts) == 3
 
-        faces = []
-        for i in range(num_faces):
-            face = lines[start_index + num_vertices + i].split(' ')
-            face = [index.strip() for index in face if index != '']
+        num_vertices = int(parts[0])
+        assert num_vertices > 0
 
-            # check to be sure
-            for index in face:
-                assert index != '', 'found empty vertex index: %s (%s)' % (lines[start_index + num_vertices + i], file)
+        num_faces = int(parts[1])
+        assert num_faces > 0
 
-            face = [int(index) for index in face]
+        data = fp.read().decode('ascii')
 
-            assert face[0] == len(face) - 1, 'face should have %d vertices but as %d (%s)' % (face[0], len(face) - 1, file)
-            assert face[0] == 3, 'only triangular meshes supported (%s)' % file
-            for index in face:
-                assert index >= 0 and index < num_vertices, 'vertex %d (of %d vertices) does not exist (%s)' % (index, num_vertices, file)
+    # All remaining numbers are parsed at once; as only triangular faces are supported,
+    # the number of values is fixed by the header.
+    values = np.fromstring(data, dtype=float, sep=' ')
+    assert values.shape[0] == 3*num_vertices + 4*num_faces, \
+        'expected %d vertices and %d triangular faces but found %d values (%s)' % (num_vertices, num_faces, values.shape[0], file)
 
-            assert len(face) > 1
+    vertices = values[:3*num_vertices].reshape(num_vertices, 3)
 
-            faces.append(face)
+    faces = values[3*num_vertices:].reshape(num_faces, 4)
+    assert np.all(faces == np.floor(faces)), 'found non-integer vertex index (%s)' % file
+    faces = faces.astype(int)
 
-        return vertices, faces
+    assert np.all(faces[:, 0] == 3), 'only triangular meshes supported (%s)' % file
+    invalid = np.logical_or(faces[:, 1:] < 0, faces[:, 1:] >= num_vertices)
+    assert not np.any(invalid), 'vertex %d (of %d vertices) does not exist (%s)' % (faces[:, 1:][invalid][0], num_vertices, file)
 
-    assert False, 'could not open %s' % file
+    return vertices, faces
 
 def write_obj(file, vertices, faces):
     """
     Writes the given vertices and faces to OBJ.
 
-    :param vertices: vertices as tuples of (x, y, z) coordinates
-    :type vertices: [(float)]
-    :param faces: faces as tuples of (num_vertices, vertex_id_1, vertex_id_2, ...)
-    :type faces: [(int)]
+    :param vertices: vertices as tuples of (x, y, z) coordinates or N x 3 array
+    :type vertices: [(float)] or numpy.ndarray
+    :param faces: faces as tuples of (vertex_id_1, vertex_id_2, vertex_id_3) or M x 3 array
+    :type faces: [(int)] or numpy.ndarray
     """
 
-    num_vertices = len(vertices)
-    num_faces = len(faces)
-
-    assert num_vertices > 0
-    assert num_faces > 0
+    vertices, faces = _check_arrays(file, vertices, faces, 3)
 
     with open(file, 'w') as fp:
-        for vertex in vertices:
-            assert len(vertex) == 3, 'invalid vertex with %d dimensions found (%s)' % (len(vertex), file)
-            fp.write('v' + ' ' + str(vertex[0]) + ' ' + str(vertex[1]) + ' ' + str(vertex[2]) + '\n')
-
-        for face in faces:
-            assert len(face) == 3, 'only triangular faces supported (%s)' % file
-            fp.write('f ')
-
-            for i in range(len(face)):
-                assert face[i] >= 0 and face[i] < num_vertices, 'invalid vertex index %d (of %d vertices) (%s)' % (face[i], num_vertices, file)
+        fp.write(_format_rows(vertices, 'v %r %r %r'))
 
-                # face indices are 1-based
-                fp.write(str(face[i] + 1))
-                if i < len(face) - 1:
-                    fp.write(' ')
-
-            fp.write('\n')
+        # face indices are 1-based
+        fp.write(_format_rows(faces + 1, 'f %d %d %d'))
 
         # add empty line to be sure
         fp.write('\n')
@@ -162,116 +189,142 @@ def read_obj(file):
     """
     Reads vertices and faces from an obj file.
 
+    Only vertices (v) and faces (f) are read, all other records (e.g. normals, texture
+    coordinates, comments, objects or groups) are skipped. Both blocks are parsed in bulk using NumPy;
+    polygons are fan-triangulated and degenerate triangles are removed, both using vectorized
+    index arithmetic. Face components of the forms v, v/vt, v//vn and v/vt/vn as well as
+    negative indices, relative to the vertices defined before the face, are supported.
+
     :param file: path to file to read
     :type file: str
-    :return: vertices and faces as lists of tuples
-    :rtype: [(float)], [(int)]
+    :return: vertices as N x 3 array and faces as M x 3 array
+    :rtype: numpy.ndarray, numpy.ndarray
     """
 
     assert os.path.exists(file), 'file %s not found' % file
 
     with open(file, 'r') as fp:
-        lines = fp.readlines()
-        lines = [line.strip() for line in lines if line.strip()]
-
-        vertices = []
-        faces = []
-        for line in lines:
-            parts = line.split(' ')
-            parts = [part.strip() for part in parts if part]
-
-            if parts[0] == 'v':
-                assert len(parts) == 4, \
-                    'vertex should be of the form v x y z, but found %d parts instead (%s)' % (len(parts), file)
-                assert parts[1] != '', 'vertex x coordinate is empty (%s)' % file
-                assert parts[2] != '', 'vertex y coordinate is empty (%s)' % file
-                assert parts[3] != '', 'vertex z coordinate is empty (%s)' % file
-
-                vertices.append([float(parts[1]), float(parts[2]), float(parts[3])])
-            elif parts[0] == 'f':
-                assert len(parts) == 4, \
-                    'face should be of the form f v1/vt1/vn1 v2/vt2/vn2 v2/vt2/vn2, but found %d parts (%s) instead (%s)' % (len(parts), line, file)
-
-                components = parts[1].split('/')
-                assert len(components) >= 1 and len(components) <= 3, \
-                   'face component should have the forms v, v/vt or v/vt/vn, but found %d components instead (%s)' % (len(components), file)
-                assert components[0].strip() != '', \
-                    'face component is empty (%s)' % file
-                v1 = int(components[0])
-
-                components = parts[2].split('/')
-                assert len(components) >= 1 and len(components) <= 3, \
-                    'face component should have the forms v, v/vt or v/vt/vn, but found %d components instead (%s)' % (len(components), file)
-                assert components[0].strip() != '', \
-                    'face component is empty (%s)' % file
-                v2 = int(components[0])
-
-                components = parts[3].split('/')
-                assert len(components) >= 1 and len(components) <= 3, \
-                    'face component should have the forms v, v/vt or v/vt/vn, but found %d components instead (%s)' % (len(components), file)
-                assert components[0].strip() != '', \
-                    'face component is empty (%s)' % file
-                v3 = int(components[0])
-
-                #assert v1 != v2 and v2 != v3 and v3 != v2, 'degenerate face detected: %d %d %d (%s)' % (v1, v2, v3, file)
-                if v1 == v2 or v2 == v3 or v1 == v3:
-                    print('[Info] skipping degenerate face in %s' % file)
-                else:
-                    faces.append([v1 - 1, v2 - 1, v3 - 1]) # indices are 1-based!
-            else:
-                assert False, 'expected either vertex or face but got line: %s (%s)' % (line, file)
-
-        return vertices, faces
-
-    assert False, 'could not open %s' % file
-
-def write_ply(file, vertices, faces):
+        text = fp.read()
+
+    text = text.replace('\t', ' ').replace('\r', ' ')
+    if text.startswith(' ') or '\n ' in text:
+        text = re.sub(r'(?m)^ +', '', text)
+    data = np.frombuffer((text + '\n').encode('utf-8'), dtype=np.uint8)
+
+    # Every line is classified by its first two characters.
+    line_ends = np.flatnonzero(data == ord('\n'))
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    first = data[line_starts]
+    second = data[np.minimum(line_starts + 1, data.shape[0] - 1)]
+    is_vertex = np.logical_and(first == ord('v'), second == ord(' '))
+    is_face = np.logical_and(first == ord('f'), second == ord(' '))
+
+    def tokenize(selected):
+        # Blank the record type and count the values of every selected line using the
+        # positions of whitespace; returns the values as string and the counts per line.
+        block = data.copy()
+        block[line_starts[selected]] = ord(' ')
+        block = block[np.repeat(selected, line_ends - line_starts + 1)]
+
+        # Everything from a slash up to the next whitespace, i.e. texture coordinate and
+        # normal indices of face components, is blanked.
+        slashes = block == ord('/')
+        if np.any(slashes):
+            events = np.logical_or(slashes, block <= ord(' '))
+            last_event = np.maximum.accumulate(np.where(events, np.arange(block.shape[0]), 0))
+            block[slashes[last_event]] = ord(' ')
+
+        whitespace = block <= ord(' ')
+        token_starts = np.flatnonzero(np.logical_and(np.logical_not(whitespace[1:]), whitespace[:-1])) + 1
+        if block.shape[0] > 0 and not whitespace[0]:
+            token_starts = np.concatenate(([0], token_starts))
+        block_line_ends = np.flatnonzero(block == ord('\n'))
+        counts = np.diff(np.concatenate(([0], np.searchsorted(token_starts, block_line_ends))))
+        return block.tobytes().decode('utf-8'), counts
+
+    # Vertices may have an additional w coordinate or colors; if the number of values
+    # differs between vertices, the first three values of every vertex are used.
+    vertex_text, sizes = tokenize(is_vertex)
+    num_vertices = sizes.shape[0]
+    assert np.all(sizes >= 3), 'vertex should be of the form v x y z (%s)' % file
+    if num_vertices > 0 and np.all(sizes == sizes[0]):
+        vertices = np.fromstring(vertex_text, dtype=float, sep=' ').reshape(num_vertices, -1)[:, :3]
+    else:
+        vertices = np.array([line.split()[:3] for line in vertex_text.splitlines()], dtype=float).reshape(-1, 3)
+
+    face_text, counts = tokenize(is_face)
+    indices = np.fromstring(face_text, dtype=int, sep=' ')
+    assert indices.shape[0] == np.sum(counts), 'could not parse faces (%s)' % file
+
+    # Indices are 1-based, negative indices are relative to the vertices defined before the face.
+    vertices_before = np.repeat(np.cumsum(is_vertex)[is_face], counts)
+    indices = np.where(indices < 0, indices + vertices_before, indices - 1)
+    invalid = np.logical_or(indices < 0, indices >= num_vertices)
+    assert not np.any(invalid), 'vertex %d (of %d vertices) does not exist (%s)' % (indices[invalid][0], num_vertices, file)
+
+    # Fan triangulation, a face with k vertices results in k - 2 triangles (first, i, i + 1).
+    num_triangles = np.maximum(counts - 2, 0)
+    starts = np.cumsum(counts) - counts
+    first = np.repeat(starts, num_triangles)
+    offset = np.arange(np.sum(num_triangles)) - np.repeat(np.cumsum(num_triangles) - num_triangles, num_triangles) + 1
+    faces = np.stack((indices[first], indices[first + offset], indices[first + offset + 1]), axis=1).reshape(-1, 3)
+
+    degenerate = np.logical_or.reduce((faces[:, 0] == faces[:, 1], faces[:, 1] == faces[:, 2], faces[:, 0] == faces[:, 2]))
+    if np.any(degenerate):
+        print('[Info] skipping %d degenerate faces in %s' % (np.sum(degenerate), file))
+        faces = faces[np.logical_not(degenerate)]
+
+    return vertices, faces
+
+def write_ply(file, vertices, faces, binary=False):
     """
-    Writes the given vertices and faces to PLY.
-
-    :param vertices: vertices as tuples of (x, y, z) coordinates
-    :type vertices: [(float)]
-    :param faces: faces as tuples of (num_vertices, vertex_id_1, vertex_id_2, ...)
-    :type faces: [(int)]
+    Writes the given vertices and faces to PLY, either as ASCII or binary little endian.
+
+    :param vertices: vertices as tuples of (x, y, z) coordinates or N x 3 array
+    :type vertices: [(float)] or numpy.ndarray
+    :param faces: faces as tuples of (vertex_id_1, vertex_id_2, vertex_id_3) or M x 3 array
+    :type faces: [(int)] or numpy.ndarray
+    :param binary: whether to write binary PLY
+    :type binary: bool
     """
 
-    num_vertices = len(vertices)
-    num_faces = len(faces)
+    vertices, faces = _check_arrays(file, vertices, faces, 3)
 
-    assert num_vertices > 0
-    assert num_faces > 0
+    if binary:
+        ply.write_binary_ply(file, vertices, faces)
+        return
 
     with open(file, 'w') as fp:
         fp.write('ply\n')
         fp.write('format ascii 1.0\n')
-        fp.write('element vertex ' + str(len(vertices)))
-        fp.write('property float x')
-        fp.write('property float y')
-        fp.write('property float z')
-        fp.write('element face ' + str(len(faces)))
-        fp.write('property list uchar int vertex_indices')
-        fp.write('end_header')
+        fp.write('element vertex %d\n' % vertices.shape[0])
+        fp.write('property float x\n')
+        fp.write('property float y\n')
+        fp.write('property float z\n')
+        fp.write('element face %d\n' % faces.shape[0])
+        fp.write('property list uchar int vertex_indices\n')
+        fp.write('end_header\n')
 
-        for vertex in vertices:
-            assert len(vertex) == 3, 'invalid vertex with %d dimensions found (%s)' % (len(vertex), file)
-            fp.write(str(vertex[0]) + ' ' + str(vertex[1]) + ' ' + str(vertex[2]) + '\n')
+        fp.write(_format_rows(vertices, '%r %r %r'))
 
-        for face in faces:
-            assert len(face) == 3, 'only triangular faces supported (%s)' % file
-            fp.write('3 ')
+        # face indices are 0-based
+        fp.write(_format_rows(faces, '3 %d %d %d'))
 
-            for i in range(len(face)):
-                assert face[i] >= 0 and face[i] < num_vertices, 'invalid vertex index %d (of %d vertices) (%s)' % (face[i], num_vertices, file)
+def read_ply(file):
+    """
+    Reads vertices and faces from an ASCII or binary PLY file.
 
-                # face indices are 0-based
-                fp.write(str(face[i]))
-                if i < len(face) - 1:
-                    fp.write(' ')
+    :param file: path to file to read
+    :type file: str
+    :return: vertices as N x 3 array and faces as M x 3 array
+    :rtype: numpy.ndarray, numpy.ndarray
+    """
 
-            fp.write('\n')
+    vertices, faces, _ = ply.read_ply(file)
+    assert faces.shape[0] > 0, 'no faces found (%s)' % file
+    assert faces.shape[1] == 3, 'only triangular faces supported (%s)' % file
 
-        # add empty line to be sure
-        fp.write('\n')
+    return vertices, faces
 
 class Mesh:
     """
@@ -376,13 +429,7 @@ class Mesh:
         """
 
         vertices, faces = read_off(filepath)
-
-        real_faces = []
-        for face in faces:
-            assert len(face) == 4
-            real_faces.append([face[1], face[2], face[3]])
-
-        return Mesh(vertices, real_faces)
+        return Mesh(vertices, faces[:, 1:])
 
     def to_off(self, filepath):
         """
@@ -395,7 +442,7 @@ class Mesh:
         faces = np.ones((self.faces.shape[0], 4), dtype = int)*3
         faces[:, 1:4] = self.faces[:, :]
 
-        write_off(filepath, self.vertices.tolist(), faces.tolist())
+        write_off(filepath, self.vertices, faces)
 
     @staticmethod
     def from_obj(filepath):
@@ -419,4 +466,30 @@ class Mesh:
         :type filepath: str
         """
 
-        write_obj(filepath, self.vertices.tolist(), self.faces.tolist())
\ No newline at end of file
+        write_obj(filepath, self.vertices, self.faces)
+
+    @staticmethod
+    def from_ply(filepath):
+        """
+        Read a mesh from PLY.
+
+        :param filepath: path to PLY file
+        :type filepath: str
+        :return: mesh
+        :rtype: Mesh
+        """
+
+        vertices, faces = read_ply(filepath)
+        return Mesh(vertices, faces)
+
+    def to_ply(self, filepath, binary=False):
+        """
+        Write mesh to PLY file.
+
+        :param filepath: path to PLY file
+        :type filepath: str
+        :param binary: whether to write binary PLY
+        :type binary: bool
+        """
+
+        write_ply(filepath, self.vertices, self.faces, binary)
\ No newline at end of file
@@ -0,0 +1,194 @@
+import os
+import numpy as np
+
+
+PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1',
+    'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2',
+    'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4',
+    'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4',
+    'double': 'f8', 'float64': 'f8',
+}
+""" (dict) PLY property types and corresponding NumPy types (without byte order). """
+
+
+def write_binary_ply(file, vertices, faces=None, colors=None):
+    """
+    Writes the given vertices, and optionally faces and vertex colors, to a binary little endian PLY.
+    Vertex and face records are written directly from structured arrays.
+
+    :param file: path to file to write
+    :type file: str
+    :param vertices: vertices as N x 3 array
+    :type vertices: numpy.ndarray
+    :param faces: faces as M x 3 array of vertex indices
+    :type faces: numpy.ndarray
+    :param colors: vertex colors as N x 3 array of values in [0, 255]
+    :type colors: numpy.ndarray
+    """
+
+    vertices = np.asarray(vertices)
+    assert vertices.ndim == 2 and vertices.shape[1] == 3
+
+    vertex_dtype = [('x', '<f4'), ('y', '<f4'), ('z', '<f4')]
+    if colors is not None:
+        colors = np.asarray(colors)
+        assert colors.shape == vertices.shape
+        vertex_dtype += [('red', 'u1'), ('green', 'u1'), ('blue', 'u1')]
+
+    vertex_data = np.empty(vertices.shape[0], dtype=vertex_dtype)
+    vertex_data['x'] = vertices[:, 0]
+    vertex_data['y'] = vertices[:, 1]
+    vertex_data['z'] = vertices[:, 2]
+    if colors is not None:
+        vertex_data['red'] = colors[:, 0]
+        vertex_data['green'] = colors[:, 1]
+        vertex_data['blue'] = colors[:, 2]
+
+    if faces is not None:
+        faces = np.asarray(faces)
+        assert faces.ndim == 2 and faces.shape[1] == 3, 'only triangular faces supported (%s)' % file
+        assert np.all(faces >= 0) and np.all(faces < vertices.shape[0]), 'invalid vertex index found (%s)' % file
+
+        face_data = np.empty(faces.shape[0], dtype=[('count', 'u1'), ('vertex_indices', '<i4', (3,))])
+        face_data['count'] = 3
+        face_data['vertex_indices'] = faces
+
+    with open(file, 'wb') as fp:
+        header = 'ply\n'
+        header += 'format binary_little_endian 1.0\n'
+        header += 'element vertex %d\n' % vertices.shape[0]
+        header += 'property float x\n'
+        header += 'property float y\n'
+        header += 'property float z\n'
+        if colors is not None:
+            header += 'property uchar red\n'
+            header += 'property uchar green\n'
+            header += 'property uchar blue\n'
+        if faces is not None:
+            header += 'element face %d\n' % faces.shape[0]
+            header += 'property list uchar int vertex_indices\n'
+        header += 'end_header\n'
+
+        fp.write(header.encode('ascii'))
+        fp.write(vertex_data.tobytes())
+        if faces is not None:
+            fp.write(face_data.tobytes())
+
+
+def read_ply_header(fp):
+    """
+    Reads the PLY header. Mostly meant for internal use.
+
+    :param fp: file opened in binary mode
+    :type fp: file
+    :return: format and elements as list of (name, count, properties); properties are (name, type)
+        or (name, count type, item type) for lists
+    :rtype: str, [(str, int, [(str)])]
+    """
+
+    line = fp.readline().strip()
+    if line != b'ply':
+        raise IOError('Not a PLY file')
+
+    ply_format = None
+    elements = []
+    while True:
+        line = fp.readline()
+        if not line:
+            raise IOError('PLY header not terminated')
+
+        parts = line.decode('ascii').split()
+        if len(parts) == 0 or parts[0] in ['comment', 'obj_info']:
+            continue
+        elif parts[0] == 'end_header':
+            break
+        elif parts[0] == 'format':
+            ply_format = parts[1]
+        elif parts[0] == 'element':
+            elements.append((parts[1], int(parts[2]), []))
+        elif parts[0] == 'property':
+            if parts[1] == 'list':
+                elements[-1][2].append((parts[4], PLY_TYPES[parts[2]], PLY_TYPES[parts[3]]))
+            else:
+                elements[-1][2].append((parts[2], PLY_TYPES[parts[1]]))
+
+    assert ply_format in ['ascii', 'binary_little_endian', 'binary_big_endian'], 'invalid PLY format %s' % ply_format
+    return ply_format, elements
+
+
+def read_ply(file):
+    """
+    Reads vertices, faces and vertex colors from an ASCII or binary PLY file. The vertex element is
+    expected to come first; faces are expected to have the same number of vertices.
+
+    Binary files are read without any parsing, using structured arrays.
+
+    :param file: path to file to read
+    :type file: str
+    :return: vertices as N x 3 array, faces as M x K array (M = 0 without faces) and colors as
+        N x 3 array (or None without colors)
+    :rtype: numpy.ndarray, numpy.ndarray, numpy.ndarray
+    """
+
+    assert os.path.exists(file), 'file %s not found' % file
+
+    with open(file, 'rb') as fp:
+        ply_format, elements = read_ply_header(fp)
+        data = fp.read()
+
+    assert len(elements) > 0 and elements[0][0] == 'vertex', 'vertex element expected first (%s)' % file
+    for name, count, properties in elements:
+        assert name in ['vertex', 'face'], 'unsupported element %s (%s)' % (name, file)
+
+    vertex_count, vertex_properties = elements[0][1], elements[0][2]
+    names = [prop[0] for prop in vertex_properties]
+    assert all(len(prop) == 2 for prop in vertex_properties), 'unsupported list property in vertex element (%s)' % file
+
+    face_count = 0
+    face_property = None
+    if len(elements) > 1:
+        assert len(elements[1][2]) == 1 and len(elements[1][2][0]) == 3, 'faces need a single list property (%s)' % file
+        face_count, face_property = elements[1][1], elements[1][2][0]
+
+    if ply_format == 'ascii':
+        values = np.fromstring(data.decode('ascii'), dtype=float, sep=' ')
+        vertex_data = values[:vertex_count*len(names)].reshape(vertex_count, len(names))
+        vertex_data = dict((name, vertex_data[:, i]) for i, name in enumerate(names))
+
+        face_data = values[vertex_count*len(names):]
+        if face_count > 0:
+            face_size = int(face_data[0])
+            assert face_data.shape[0] == face_count*(face_size + 1), 'faces need to have equal size (%s)' % file
+            face_data = face_data.reshape(face_count, face_size + 1)
+            assert np.all(face_data[:, 0] == face_size), 'faces need to have equal size (%s)' % file
+            faces = face_data[:, 1:].astype(int)
+        else:
+            faces = np.zeros((0, 3), dtype=int)
+    else:
+        byte_order = '<' if ply_format == 'binary_little_endian' else '>'
+        vertex_dtype = np.dtype([(name, byte_order + value_type) for name, value_type in vertex_properties])
+        vertex_data = np.frombuffer(data, dtype=vertex_dtype, count=vertex_count)
+
+        if face_count > 0:
+            offset = vertex_count*vertex_dtype.itemsize
+            count_dtype = np.dtype(byte_order + face_property[1])
+            face_size = int(np.frombuffer(data, dtype=count_dtype, count=1, offset=offset)[0])
+            face_dtype = np.dtype([('count', count_dtype), ('vertex_indices', byte_order + face_property[2], (face_size,))])
+            face_data = np.frombuffer(data, dtype=face_dtype, count=face_count, offset=offset)
+            assert np.all(face_data['count'] == face_size), 'faces need to have equal size (%s)' % file
+            faces = face_data['vertex_indices'].astype(int)
+        else:
+            faces = np.zeros((0, 3), dtype=int)
+
+    vertices = np.stack([vertex_data['x'], vertex_data['y'], vertex_data['z']], axis=1).astype(float)
+
+    colors = None
+    if 'red' in names and 'green' in names and 'blue' in names:
+        colors = np.stack([vertex_data['red'], vertex_data['green'], vertex_data['blue']], axis=1).astype(np.uint8)
+
+    assert np.all(faces >= 0) and np.all(faces < vertex_count), 'invalid vertex index found (%s)' % file
+    return vertices, faces, colors
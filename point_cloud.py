@@ -1,17 +1,147 @@
 import os
 import numpy as np
+import ply
+
+
+def read_txt(filepath):
+    """
+    Read all columns of a TXT point cloud, see the documentation for the format. Lines starting
+    with # are skipped; the header with the number of points is optional, but if given, it is checked.
+    All values are parsed at once.
+
+    :param filepath: path to TXT file
+    :return: N x C array of points, C >= 3; additional columns are, for example, colors or normals
+    """
+
+    assert os.path.exists(filepath), 'file %s not found' % filepath
+
+    with open(filepath, 'r') as f:
+        text = f.read()
+
+    if '#' in text:
+        text = '\n'.join([line for line in text.split('\n') if not line.lstrip().startswith('#')])
+
+    first_line, _, rest = text.lstrip().partition('\n')
+    parts = first_line.split()
+
+    num_points = None
+    if len(parts) == 1:
+        num_points = int(parts[0])
+        text = rest
+
+    first_line = text.lstrip().partition('\n')[0]
+    num_columns = len(first_line.split())
+    if num_columns == 0:
+        assert not num_points, 'expected %d points but found none (%s)' % (num_points, filepath)
+        return np.zeros((0, 3))
+
+    assert num_columns >= 3, 'invalid line: %s (%s)' % (first_line, filepath)
+
+    values = np.fromstring(text, dtype=float, sep=' ')
+    if num_points is None:
+        num_points = values.shape[0] // num_columns
+    assert values.shape[0] == num_points * num_columns, \
+        'expected %d points with %d columns but found %d values (%s)' % (num_points, num_columns, values.shape[0], filepath)
+
+    return values.reshape(num_points, num_columns)
+
+
+def write_txt(filepath, points):
+    """
+    Write a TXT point cloud, all rows are formatted at once.
+
+    :param filepath: path to output file
+    :param points: N x C array of points, C >= 3
+    """
+
+    points = np.asarray(points, dtype=float)
+    assert points.ndim == 2 and points.shape[1] >= 3
+
+    row = ' '.join(['%r'] * points.shape[1]) + '\n'
+    with open(filepath, 'w') as f:
+        f.write(str(points.shape[0]) + '\n')
+        f.write((row * points.shape[0]) % tuple(points.ravel().tolist()))
+
+
+PCB_HEADER_SIZE = 256
+""" (int) Size of the header of binary point clouds in bytes. """
+
+
+def write_pcb(filepath, points, columns=None):
+    """
+    Write a binary point cloud: a fixed-size ASCII header with number of points, data type and
+    column names, followed by the points as raw little endian float32 N x C array. The points
+    can then be memory-mapped without any parsing, see read_pcb.
+
+    :param filepath: path to output file
+    :param points: N x C array of points, C >= 3
+    :param columns: names of the C columns, defaults to x, y, z, a0, a1, ...
+    """
+
+    points = np.asarray(points, dtype='<f4')
+    assert points.ndim == 2 and points.shape[1] >= 3
+
+    if columns is None:
+        columns = ['x', 'y', 'z'] + ['a%d' % i for i in range(points.shape[1] - 3)]
+    assert len(columns) == points.shape[1]
+
+    header = 'pcb 1\ncount %d\ndtype <f4\ncolumns %s\n' % (points.shape[0], ' '.join(columns))
+    assert len(header) + len('end_header\n') <= PCB_HEADER_SIZE, 'too many columns'
+    header += ' ' * (PCB_HEADER_SIZE - len(header) - len('end_header\n')) + 'end_header\n'
+
+    with open(filepath, 'wb') as f:
+        f.write(header.encode('ascii'))
+        f.write(np.ascontiguousarray(points).tobytes())
+
+
+def read_pcb(filepath, mmap=True):
+    """
+    Read a binary point cloud, see write_pcb. By default, the points are memory-mapped such that
+    slicing, e.g. the first N points or every k-th point, does not read the whole file.
+
+    :param filepath: path to binary point cloud
+    :param mmap: whether to memory-map the points instead of reading them
+    :return: N x C array of points and column names
+    """
+
+    assert os.path.exists(filepath), 'file %s not found' % filepath
+
+    with open(filepath, 'rb') as f:
+        header = f.read(PCB_HEADER_SIZE).decode('ascii')
+
+    lines = [line.split() for line in header.split('\n')]
+    if lines[0] != ['pcb', '1'] or not ['end_header'] in lines:
+        raise IOError('Not a binary point cloud')
+
+    fields = dict((line[0], line[1:]) for line in lines if len(line) > 0)
+    num_points = int(fields['count'][0])
+    dtype = np.dtype(fields['dtype'][0])
+    columns = fields['columns']
+
+    if num_points == 0:
+        return np.zeros((0, len(columns)), dtype=dtype), columns
+
+    if mmap:
+        points = np.memmap(filepath, dtype=dtype, mode='r', offset=PCB_HEADER_SIZE, shape=(num_points, len(columns)))
+    else:
+        points = np.fromfile(filepath, dtype=dtype, count=num_points*len(columns), offset=PCB_HEADER_SIZE)
+        points = points.reshape(num_points, len(columns))
+
+    return points, columns
 
 
 class PointCloud:
     """
-    Encapsulates a set of points stored as N x 3 matrix.
+    Encapsulates a set of points stored as N x 3 matrix, optionally with additional attributes
+    per point (such as colors or normals) stored as N x K matrix.
     """
 
-    def __init__(self, points=None):
+    def __init__(self, points=None, attributes=None):
         """
         Constructor.
 
         :param points: points as list or np.array
+        :param attributes: additional attributes per point as list or np.array
         """
 
         if points is None:
@@ -19,60 +149,123 @@ class PointCloud:
         else:
             self.points = np.array(points)
 
+        if attributes is None:
+            self.attributes = np.zeros((self.points.shape[0], 0))
+        else:
+            self.attributes = np.array(attributes)
+            assert self.attributes.shape[0] == self.points.shape[0]
+
+    def downsample(self, cell_size, centroid=False):
+        """
+        Downsample by quantizing the points to a regular grid and keeping a single point per cell.
+        This removes points that are visually indistinguishable when rendering the points with a
+        radius similar to the cell size.
+
+        :param cell_size: side length of grid cells
+        :param centroid: use the centroid of all points in a cell instead of the first point
+        :return: downsampled point cloud
+        """
+
+        assert cell_size > 0
+        if self.points.shape[0] == 0:
+            return PointCloud(self.points, self.attributes)
+
+        cells = np.floor((self.points - np.min(self.points, axis=0)) / cell_size).astype(np.int64)
+        sizes = np.max(cells, axis=0) + 1
+
+        # The cell coordinates are packed into a single integer key per point.
+        keys = (cells[:, 0] * sizes[1] + cells[:, 1]) * sizes[2] + cells[:, 2]
+        _, indices, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+        if not centroid:
+            indices = np.sort(indices)
+            return PointCloud(self.points[indices], self.attributes[indices])
+
+        # Attributes are averaged in the same way as the points.
+        values = np.concatenate((self.points, self.attributes), axis=1)
+        inverse = inverse.reshape(-1)
+        counts = np.bincount(inverse)
+        averages = np.zeros((counts.shape[0], values.shape[1]))
+        for j in range(values.shape[1]):
+            averages[:, j] = np.bincount(inverse, weights=values[:, j]) / counts
+
+        return PointCloud(averages[:, :3], averages[:, 3:])
+
     @staticmethod
     def from_txt(filepath):
         """
-        Load from TXT file.
+        Load from TXT file; columns after the third are kept as attributes.
 
         :param filepath: path to TXT file.
         :return: point cloud
         """
 
-        assert os.path.exists(filepath)
+        data = read_txt(filepath)
+        return PointCloud(data[:, :3], data[:, 3:])
 
-        with open(filepath, 'r') as f:
-            lines = f.readlines()
-            lines = [line.strip() for line in lines if line.strip() != '']
+    def to_txt(self, filepath):
+        """
+        Write TXT, including attributes.
 
-            num_points = int(lines[0])
-            points = np.zeros((num_points, 3))
-            assert num_points == len(lines) - 1
+        :param filepath: path to output file
+        """
 
-            for i in range(0, num_points):
-                line = lines[i + 1]
+        write_txt(filepath, np.concatenate((self.points.reshape(-1, 3), self.attributes), axis=1))
 
-                parts = line.split(' ')
-                assert len(parts) == 3, "invalid line: %s" % line
+    @staticmethod
+    def from_pcb(filepath, subset=None):
+        """
+        Load from binary point cloud; columns after the third are kept as attributes.
+        Only the given subset of points is read from the memory-mapped file.
+
+        :param filepath: path to binary point cloud
+        :param subset: slice of points to load, e.g. slice(0, 1000) or slice(None, None, 10)
+        :return: point cloud
+        """
 
-                for j in range(3):
-                    points[i, j] = float(parts[j])
+        data, _ = read_pcb(filepath)
+        if subset is not None:
+            data = data[subset]
 
-        return PointCloud(points)
+        data = np.array(data, dtype=float)
+        return PointCloud(data[:, :3], data[:, 3:])
 
-    def to_txt(self, filepath):
+    def to_pcb(self, filepath):
         """
-        Write TXT.
+        Write binary point cloud, including attributes.
 
         :param filepath: path to output file
         """
-        with open(filepath, 'w') as f:
-            f.write(str(self.points.shape[0]) + '\n')
 
-            for n in range(self.points.shape[0]):
-                f.write(str(self.points[n, 0]) + ' '  + str(self.points[n, 1]) + ' ' + str(self.points[n, 2]) + '\n')
+        write_pcb(filepath, np.concatenate((self.points.reshape(-1, 3), self.attributes), axis=1))
 
-    def to_ply(self, filepath):
+    @staticmethod
+    def from_ply(filepath):
         """
-        To PLY file.
+        Load from ASCII or binary PLY file; faces are ignored.
+
+        :param filepath: path to PLY file
+        :return: point cloud
+        """
+
+        points, _, _ = ply.read_ply(filepath)
+        return PointCloud(points)
+
+    def to_ply(self, filepath, binary=False):
+        """
+        To PLY file, either ASCII or binary little endian.
 
         :param filepath: path to output file
+        :param binary: whether to write binary PLY
         """
 
+        if binary:
+            ply.write_binary_ply(filepath, self.points, colors=np.zeros(self.points.shape, dtype=np.uint8))
+            return
+
         with open(filepath, 'w') as f:
             f.write('ply\n')
             f.write('format ascii 1.0\n')
-            #f.write('format binary_little_endian 1.0\n')
-            #f.write('format binary_big_endian 1.0\n')
             f.write('element vertex ' + str(self.points.shape[0]) + '\n')
             f.write('property float x\n')
             f.write('property float y\n')
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import argparse
+from blender_utils import *
+
+
+def read_jobs(fp):
+    """
+    Read render jobs, one JSON object per line; empty lines and lines starting with # are skipped.
+
+    Each job needs an input and an output file; optional keys are type (off, txt, pcb or binvox,
+    otherwise derived from the extension of the input), rotation, distance, azimuths (number of
+    views on a turntable, the output then needs to contain %d) and mode (see load_txt and load_binvox).
+
+    :param fp: opened manifest or stdin
+    :return: generator of jobs
+    """
+
+    for line in fp:
+        line = line.strip()
+        if line == '' or line.startswith('#'):
+            continue
+
+        job = json.loads(line)
+        assert 'input' in job and 'output' in job, 'job needs input and output: %s' % line
+
+        if not 'type' in job:
+            job['type'] = os.path.splitext(job['input'])[1][1:].lower()
+
+        yield job
+
+
+def render_job(job, camera_target, materials):
+    """
+    Render a single job in the already initialized scene; previously loaded objects are removed first.
+
+    :param job: job as read by read_jobs
+    :param camera_target: returned by initialize()
+    :param materials: materials per input type
+    """
+
+    clear()
+
+    if not os.path.exists(job['input']):
+        raise IOError('%s not found' % job['input'])
+
+    if job['type'] == 'off':
+        load_off(job['input'], materials['off'], (-0.5, -0.5, -0.5), 0.03125, 'xzy')
+    elif job['type'] == 'txt' or job['type'] == 'pcb':
+        load_txt(job['input'], 0.0075, materials['txt'], (-0.5, -0.5, -0.5), 0.03125, 'xzy', job.get('mode', 'numpy'))
+    elif job['type'] == 'binvox':
+        load_binvox(job['input'], 0.0125, materials['binvox'], (0, 0, 0), (1, 1, 1), 'zxy', job.get('mode', 'numpy'))
+    else:
+        raise ValueError('unsupported input type %s' % job['type'])
+
+    rotation = job.get('rotation', (5, 0, -55))
+    distance = job.get('distance', 0.5)
+    views = get_views(job.get('azimuths', 0), '', rotation, distance)
+    render_views(camera_target, job['output'], views)
+
+
+def main():
+    """
+    Render many OFF, TXT, PCB or BINVOX files in a single Blender process.
+    """
+
+    parser = argparse.ArgumentParser(description='Renders many meshes, point clouds or occupancy grids in one Blender process.')
+    parser.add_argument('--manifest', type=str, default='', help='Path to manifest with one JSON job per line, reads jobs from stdin if not given.')
+    parser.add_argument('--results', type=str, default='', help='Path to file the result of every job is appended to, one JSON object per line.')
+    parser.add_argument('--threads', type=int, default=0, help='Number of render threads, 0 to let Blender decide.')
+    parser.add_argument('--cache', type=str, default='', help='Directory to cache generated point cloud and occupancy geometry in.')
+    parser.add_argument('--cache_size', type=int, default=2048, help='Maximum size of the geometry cache in MB.')
+
+    try:
+        argv = sys.argv[sys.argv.index("--") + 1:]
+    except ValueError:
+        argv = ""
+    args = parser.parse_args(argv)
+
+    if args.manifest and not os.path.exists(args.manifest):
+        log('Manifest not found.', LogLevel.ERROR)
+        exit()
+
+    camera_target = initialize()
+    if args.cache:
+        enable_geometry_cache(args.cache, args.cache_size*1024**2)
+    if args.threads > 0:
+        bpy.context.scene.render.threads_mode = 'FIXED'
+        bpy.context.scene.render.threads = args.threads
+
+    materials = {
+        'off': make_material('BRC_Material_Mesh', (0.66, 0.45, 0.23), 0.8, True),
+        'txt': make_material('BRC_Material_Point_Cloud', (0.65, 0.23, 0.25), 1, True),
+        'binvox': make_material('BRC_Material_Occupancy', (0.66, 0.45, 0.23), 0.8, True),
+    }
+
+    fp = open(args.manifest, 'r') if args.manifest else sys.stdin
+    results = open(args.results, 'a') if args.results else None
+
+    start = time.time()
+    num_rendered = 0
+    num_failed = 0
+    for job in read_jobs(fp):
+        job_start = time.time()
+        try:
+            render_job(job, camera_target, materials)
+            num_rendered += 1
+            status = 'ok'
+            log('Rendered %s.' % job['output'])
+        except Exception as e:
+            num_failed += 1
+            status = 'error: %s' % str(e)
+            log('Could not render %s: %s' % (job['input'], str(e)), LogLevel.ERROR)
+
+        if results is not None:
+            results.write(json.dumps({'input': job['input'], 'output': job['output'], 'status': status, 'time': time.time() - job_start}) + '\n')
+            results.flush()
+
+    if fp is not sys.stdin:
+        fp.close()
+    if results is not None:
+        results.close()
+
+    elapsed = time.time() - start
+    log('Rendered %d jobs (%d failed) in %.2fs (%.2f jobs/s).' % (num_rendered, num_failed, elapsed, num_rendered / max(elapsed, 1e-6)))
+
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,10 @@ def main():
 
     parser = argparse.ArgumentParser(description='Renders an occupancy grid (BINVOX file).')
     parser.add_argument('--binvox', type=str, help='Path to OFF file.')
-    parser.add_argument('--output', type=str, default='output.png', help='Path to output PNG image.')
+    parser.add_argument('--output', type=str, default='output.png', help='Path to output PNG image, needs to contain %%d for multiple views.')
+    parser.add_argument('--azimuths', type=int, default=0, help='Number of views on a turntable.')
+    parser.add_argument('--views', type=str, default='', help='Path to views file, one rotation (and optionally distance) per line.')
+    parser.add_argument('--mode', type=str, default='numpy', choices=['numpy', 'culled', 'greedy', 'bmesh'], help='How to build the cubes, see load_binvox.')
 
     try:
         argv = sys.argv[sys.argv.index("--") + 1:]
@@ -25,11 +28,12 @@ def main():
     camera_target = initialize()
     binvox_material = make_material('BRC_Material_Occupancy', (0.66, 0.45, 0.23), 0.8, True)
 
-    load_binvox(args.binvox, 0.0125, binvox_material, (0, 0, 0), (1, 1, 1), 'zxy')
+    load_binvox(args.binvox, 0.0125, binvox_material, (0, 0, 0), (1, 1, 1), 'zxy', args.mode)
 
     rotation = (5, 0, -55)
     distance = 0.5
-    render(camera_target, args.output, rotation, distance)
+    views = get_views(args.azimuths, args.views, rotation, distance)
+    render_views(camera_target, args.output, views)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,173 @@
+import os
+import json
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+
+EXTENSIONS = ['.off', '.txt', '.pcb', '.binvox']
+""" ([str]) Supported input extensions. """
+
+
+def find_inputs(patterns, extensions=EXTENSIONS):
+    """
+    Find all supported input files given files, directories or glob patterns.
+
+    :param patterns: files, directories or glob patterns
+    :type patterns: [str]
+    :param extensions: supported extensions including the dot
+    :type extensions: [str]
+    :return: sorted input files
+    :rtype: [str]
+    """
+
+    inputs = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                for file in files:
+                    if os.path.splitext(file)[1].lower() in extensions:
+                        inputs.add(os.path.join(root, file))
+        else:
+            for file in glob.glob(pattern):
+                if os.path.isfile(file) and os.path.splitext(file)[1].lower() in extensions:
+                    inputs.add(file)
+
+    return sorted(inputs)
+
+
+def shard_jobs(jobs, num_shards):
+    """
+    Distribute jobs across shards; jobs are sorted by input size and assigned round-robin
+    such that all shards get a similar amount of work.
+
+    :param jobs: jobs, see render_batch.py
+    :type jobs: [dict]
+    :param num_shards: number of shards
+    :type num_shards: int
+    :return: shards
+    :rtype: [[dict]]
+    """
+
+    jobs = sorted(jobs, key=lambda job: os.path.getsize(job['input']), reverse=True)
+    shards = [jobs[i::num_shards] for i in range(num_shards)]
+    return [shard for shard in shards if len(shard) > 0]
+
+
+def run_shards(shards, blender, threads, directory, cache=''):
+    """
+    Render all shards in parallel, one Blender process running render_batch.py per shard.
+
+    :param shards: shards as returned by shard_jobs
+    :type shards: [[dict]]
+    :param blender: Blender executable
+    :type blender: str
+    :param threads: render threads per Blender process
+    :type threads: int
+    :param directory: directory for manifests, results and logs
+    :type directory: str
+    :param cache: geometry cache directory shared by all processes, or empty
+    :type cache: str
+    :return: results of all jobs as written by render_batch.py
+    :rtype: [dict]
+    """
+
+    script = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'render_batch.py')
+
+    processes = []
+    for i, shard in enumerate(shards):
+        manifest = os.path.join(directory, 'shard_%d.jsonl' % i)
+        results = os.path.join(directory, 'results_%d.jsonl' % i)
+        with open(manifest, 'w') as fp:
+            for job in shard:
+                fp.write(json.dumps(job) + '\n')
+        if os.path.exists(results):
+            os.remove(results)
+
+        command = [blender, '--background', '--python', script, '--',
+                   '--manifest', manifest, '--results', results, '--threads', str(threads)]
+        if cache:
+            command += ['--cache', cache]
+        with open(os.path.join(directory, 'log_%d.txt' % i), 'w') as log:
+            processes.append((subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT), results))
+
+    job_results = []
+    for process, results in processes:
+        process.wait()
+        if os.path.exists(results):
+            with open(results, 'r') as fp:
+                job_results += [json.loads(line) for line in fp if line.strip() != '']
+
+    return job_results
+
+
+def main():
+    """
+    Render many OFF, TXT, PCB or BINVOX files using several Blender processes in parallel.
+    """
+
+    parser = argparse.ArgumentParser(description='Renders many meshes, point clouds or occupancy grids across several Blender processes.')
+    parser.add_argument('inputs', type=str, nargs='+', help='Input files, directories or glob patterns.')
+    parser.add_argument('--output', type=str, required=True, help='Output directory for PNG images, the directory structure and extension of the inputs are kept (e.g. a/0.off becomes a/0.off.png).')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of Blender processes.')
+    parser.add_argument('--threads', type=int, default=1, help='Number of render threads per Blender process.')
+    parser.add_argument('--retries', type=int, default=1, help='Number of times failed jobs are retried.')
+    parser.add_argument('--cache', type=str, default='', help='Directory to cache generated point cloud and occupancy geometry in.')
+    parser.add_argument('--blender', type=str, default=os.environ.get('BLENDER', 'blender'), help='Blender executable.')
+
+    args = parser.parse_args()
+    assert args.workers > 0
+    assert args.threads >= 0
+
+    inputs = find_inputs(args.inputs)
+    if len(inputs) == 0:
+        print('No input files found.')
+        exit(1)
+
+    if not os.path.exists(args.output):
+        os.makedirs(args.output)
+
+    # Outputs keep the directory structure relative to the common root and the extension of the
+    # inputs, e.g. a/chair.off becomes a/chair.off.png, such that no two jobs write the same image.
+    root = os.path.dirname(inputs[0]) if len(inputs) == 1 else os.path.commonpath([os.path.abspath(input_file) for input_file in inputs])
+    jobs = []
+    for input_file in inputs:
+        relative = os.path.relpath(os.path.abspath(input_file), os.path.abspath(root))
+        output_file = os.path.join(args.output, relative + '.png')
+        if not os.path.exists(os.path.dirname(output_file)):
+            os.makedirs(os.path.dirname(output_file))
+        jobs.append({'input': input_file, 'output': output_file})
+
+    directory = tempfile.mkdtemp(prefix='render_farm_')
+    start = time.time()
+
+    remaining = jobs
+    for attempt in range(args.retries + 1):
+        if attempt > 0:
+            print('Retrying %d failed jobs.' % len(remaining))
+
+        results = run_shards(shard_jobs(remaining, args.workers), args.blender, args.threads, directory, args.cache)
+        succeeded = set(result['input'] for result in results if result['status'] == 'ok')
+        remaining = [job for job in remaining if not job['input'] in succeeded]
+
+        if len(remaining) == 0:
+            break
+
+    elapsed = time.time() - start
+    num_rendered = len(jobs) - len(remaining)
+    print('Rendered %d of %d files in %.2fs (%.2f files/s).' % (num_rendered, len(jobs), elapsed, num_rendered / max(elapsed, 1e-6)))
+
+    if len(remaining) > 0:
+        for job in remaining:
+            print('Failed: %s' % job['input'])
+        print('Logs are kept in %s.' % directory)
+        exit(1)
+
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
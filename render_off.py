@@ -10,7 +10,9 @@ def main():
 
     parser = argparse.ArgumentParser(description='Renders a mesh (OFF file).')
     parser.add_argument('--off', type=str, help='Path to OFF file.')
-    parser.add_argument('--output', type=str, default='output.png', help='Path to output PNG image.')
+    parser.add_argument('--output', type=str, default='output.png', help='Path to output PNG image, needs to contain %%d for multiple views.')
+    parser.add_argument('--azimuths', type=int, default=0, help='Number of views on a turntable.')
+    parser.add_argument('--views', type=str, default='', help='Path to views file, one rotation (and optionally distance) per line.')
 
     try:
         argv = sys.argv[sys.argv.index("--") + 1:]
@@ -29,7 +31,8 @@ def main():
 
     rotation = (5, 0, -55)
     distance = 0.5
-    render(camera_target, args.output, rotation, distance)
+    views = get_views(args.azimuths, args.views, rotation, distance)
+    render_views(camera_target, args.output, views)
 
 
 if __name__ == '__main__':
@@ -5,12 +5,19 @@ from blender_utils import *
 
 def main():
     """
-    Render a point cloud from a TXT file.
+    Render a point cloud from a TXT or PCB file.
     """
 
     parser = argparse.ArgumentParser(description='Renders a mesh (OFF file) and a point cloud (TXT file) together.')
-    parser.add_argument('--txt', type=str, help='Path to TXT file.')
-    parser.add_argument('--output', type=str, default='output.png', help='Path to output PNG image.')
+    parser.add_argument('--txt', type=str, help='Path to TXT or PCB file.')
+    parser.add_argument('--output', type=str, default='output.png', help='Path to output PNG image, needs to contain %%d for multiple views.')
+    parser.add_argument('--azimuths', type=int, default=0, help='Number of views on a turntable.')
+    parser.add_argument('--mode', type=str, default='numpy', choices=['numpy', 'instancing', 'bmesh'], help='How to build the spheres, see load_txt.')
+    parser.add_argument('--lod', type=str, default='', help='Level of detail of points: cube, subdivisions of ico sphere or auto, see load_txt.')
+    parser.add_argument('--downsample', action='store_true', help='Render only one point per grid cell of the size of the points.')
+    parser.add_argument('--max_points', type=int, default=0, help='Only render the first points.')
+    parser.add_argument('--stride', type=int, default=1, help='Only render every k-th point.')
+    parser.add_argument('--views', type=str, default='', help='Path to views file, one rotation (and optionally distance) per line.')
 
     try:
         argv = sys.argv[sys.argv.index("--") + 1:]
@@ -24,11 +31,17 @@ def main():
 
     camera_target = initialize()
     txt_material = make_material('BRC_Material_Point_Cloud', (0.65, 0.23, 0.25), 1, True)
-    load_txt(args.txt, 0.0075, txt_material, (-0.5, -0.5, -0.5), 0.03125, 'xzy')
 
     rotation = (5, 0, -55)
     distance = 0.5
-    render(camera_target, args.output, rotation, distance)
+    lod = int(args.lod) if args.lod.isdigit() else (args.lod if args.lod else None)
+    subset = None
+    if args.max_points > 0 or args.stride > 1:
+        subset = slice(0, args.max_points if args.max_points > 0 else None, args.stride)
+    load_txt(args.txt, 0.0075, txt_material, (-0.5, -0.5, -0.5), 0.03125, 'xzy', args.mode, lod, distance, args.downsample, subset)
+
+    views = get_views(args.azimuths, args.views, rotation, distance)
+    render_views(camera_target, args.output, views)
 
 
 if __name__ == '__main__':
@@ -11,6 +11,7 @@ def main():
     parser = argparse.ArgumentParser(description='Convert TXT to PLY.')
     parser.add_argument('input', type=str, help='TXT file.')
     parser.add_argument('output', type=str, help='PLY file.')
+    parser.add_argument('--binary', action='store_true', help='Write binary little endian PLY.')
 
     args = parser.parse_args()
     if not os.path.exists(args.input):
@@ -20,7 +21,7 @@ def main():
     point_cloud = PointCloud.from_txt(args.input)
     print('Read %s.' % args.input)
 
-    point_cloud.to_ply(args.output)
+    point_cloud.to_ply(args.output, args.binary)
     print('Wrote %s.' % args.output)
 
 
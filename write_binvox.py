@@ -12,6 +12,6 @@ if __name__ == '__main__':
     volume[10:22, 10:22, 10:22] = 1
 
     model = binvox_rw.Voxels(volume > 0.5, volume.shape, (0, 0, 0), 1)
-    with open(args.output, 'w') as fp:
+    with open(args.output, 'wb') as fp:
         model.write(fp)
         print('Wote %s.' % args.output)
\ No newline at end of file